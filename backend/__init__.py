@@ -5,21 +5,38 @@ from books.routes import book_router
 from db.main import init_db
 from auth.routes import auth_router
 from reviews.routes import review_router
-from middleware import register_middleware
+from middleware import register_middleware, file_logging
+from metrics import metrics_router
+from db.redis import blocklist_cache
+from auth.utils import password_hasher
+from responses import DefaultResponse
 
 
 
 
 version= "v1"
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    with file_logging():
+        await blocklist_cache.start()
+        yield
+        await blocklist_cache.stop()
+        password_hasher.shutdown()
+
+
 app = FastAPI(
     title="Bookly",
     description="A REST api",
     version= version,
+    lifespan=lifespan,
+    default_response_class=DefaultResponse,
 )
 
 register_middleware(app)
 
 app.include_router(book_router, prefix=f"/api/{version}/books" , tags=["Books"])
 app.include_router(auth_router, prefix=f"/api/{version}/auth", tags=["Auth"])
-app.include_router(review_router, prefix=f"/api/{version}/reviews", tags=["Reviews"])
\ No newline at end of file
+app.include_router(review_router, prefix=f"/api/{version}/reviews", tags=["Reviews"])
+app.include_router(metrics_router)
\ No newline at end of file
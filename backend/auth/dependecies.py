@@ -4,13 +4,14 @@ from fastapi.security.http import HTTPAuthorizationCredentials
 from fastapi.exceptions import HTTPException
 from .utils import decode_token
 from .service import UserService
-from .schemas import UserCreateModel
+from .schemas import UserCreateModel, TokenUserModel
 from db.models import User
-from db.redis import token_in_blocklist
+from db.redis import token_in_blocklist, get_token_version, seed_token_version
+from config import Config
 from db.main import get_session
 from markupsafe import escape
 from sqlmodel.ext.asyncio.session import AsyncSession
-from typing import List
+from typing import List, Union
 
 user_service = UserService()
 
@@ -26,7 +27,7 @@ class TokenBearer(HTTPBearer):
     def __init__(self, auto_error: bool = True):
         super().__init__(auto_error=auto_error)
 
-    async def __call__(self, request: Request):
+    async def __call__(self, request: Request, session: AsyncSession = Depends(get_session)):
         creds = await super().__call__(request)
         if creds is None:
             raise HTTPException(
@@ -36,17 +37,22 @@ class TokenBearer(HTTPBearer):
 
         token = creds.credentials
 
+        # Several dependencies of one request may authenticate the same token,
+        # the decoded and checked claims are shared through the request scope
+        checked = getattr(request.state, "checked_token", None)
+        if checked is not None and checked[0] == token:
+            token_data = checked[1]
+        else:
+            token_data = await self.check_token(token, session)
+            request.state.checked_token = (token, token_data)
+
+        self.verify_token_data(token_data)
+
+        return token_data
+
+    async def check_token(self, token: str, session: AsyncSession) -> dict:
         token_data = decode_token(token)
-        
-        if not self.token_valid(token):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail={
-                    "error": "THIS TOKEN IS INVALID OR EXPIRED",
-                    "resolution": "PLEASE GET NEW TOKEN"
-                }
-            )
-        
+
         if await token_in_blocklist(token_data['jti']):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN, detail={
@@ -55,17 +61,31 @@ class TokenBearer(HTTPBearer):
                 }
             )
 
-        self.verify_token_data(token_data)
+        if await self.token_version_stale(token_data, session):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN, detail={
+                    "error": "THIS TOKEN IS OUTDATED",
+                    "resolution": "PLEASE LOG IN AGAIN"
+                }
+            )
 
         return token_data
 
-    def token_valid(self, token: str) -> bool:
-      
-        try:
-            token_data = decode_token(token)
-            return token_data is not None
-        except Exception:
-            return False  
+    async def token_version_stale(self, token_data: dict, session: AsyncSession) -> bool:
+        user_info = token_data.get('user') or {}
+        if 'token_version' not in user_info:
+            return False
+
+        user_uid = user_info['user_uid']
+        current_version = await get_token_version(user_uid)
+        if current_version is None:
+            # Never written, evicted or flushed: the users table has the
+            # version that counts, and Redis gets it back for the next request
+            current_version = await user_service.get_token_version(user_uid, session)
+            if current_version is not None:
+                await seed_token_version(user_uid, current_version)
+
+        return current_version is not None and user_info['token_version'] < current_version
 
     def verify_token_data(self, token_data: dict) -> None:
         
@@ -89,8 +109,12 @@ class RefreshTokenBearer(TokenBearer):
             )
 
 
+# Shared instance so FastAPI's per-request dependency cache resolves it once
+access_token_bearer = AccessTokenBearer()
+
+
 async def get_current_user(
-        token_details: dict=Depends(AccessTokenBearer()), 
+        token_details: dict=Depends(access_token_bearer), 
         session : AsyncSession= Depends(get_session) ):
     
     user_info = token_details.get('user')
@@ -106,11 +130,30 @@ async def get_current_user(
     return  user
 
 
+async def get_current_principal(
+        token_details: dict=Depends(access_token_bearer),
+        session : AsyncSession= Depends(get_session) ):
+    # Stateless mode authorizes straight from the token claims; tokens issued
+    # before the claims existed still go through the database lookup
+    user_info = token_details.get('user') or {}
+
+    if Config.STATELESS_AUTH and {'role', 'is_verified', 'token_version'} <= user_info.keys():
+        return TokenUserModel(
+            id=user_info['user_uid'],
+            email=user_info['email'],
+            role=user_info['role'],
+            is_verified=user_info['is_verified'],
+            token_version=user_info['token_version'],
+        )
+
+    return await get_current_user(token_details, session)
+
+
 class RoleChecker:
     def __init__(self, allowed_roles:List[str]):
         self.allowed_role = allowed_roles
 
-    def __call__(self, current_user:User= Depends(get_current_user)):
+    def __call__(self, current_user:Union[User, TokenUserModel]= Depends(get_current_principal)):
         if not current_user.is_verified:
             raise HTTPException(
                 status_code= status.HTTP_403_FORBIDDEN,
@@ -1,5 +1,5 @@
 
-from fastapi import APIRouter, Depends, status , BackgroundTasks
+from fastapi import APIRouter, BackgroundTasks, Depends, status
 from .schemas import (
     UserCreateModel,
     UserViewModel,
@@ -9,25 +9,25 @@ from .schemas import (
     PasswordResetRequestModel,
     PasswordResetConfirmModel   
 )
-from celery_tasks import send_email
-from .service import UserService
+from celery_tasks import enqueue_mail
+from .service import UserService, USER_VIEW_LOAD
 from .utils import (
     create_access_token,
+    user_token_claims,
     decode_token,
-    generate_pass_hash,
-    verify_pass,
+    password_hasher,
     create_url_safe_token,
     decode_url_safe_token,
     validate_email,
 )
-from db.main import get_session
+from db.main import get_session, get_read_session
 from sqlmodel.ext.asyncio.session import AsyncSession
 from fastapi.exceptions import HTTPException
 from datetime import datetime, timedelta
 from fastapi.responses import JSONResponse
 from .dependecies import (
     RefreshTokenBearer,
-    AccessTokenBearer,
+    access_token_bearer,
     get_current_user,
     RoleChecker,
     sanitize_input,
@@ -35,7 +35,6 @@ from .dependecies import (
 from db.redis import add_jti_to_blocklist
 from db.main import get_session
 from config import Config
-from mail import mail, CreateMessage
 
 
 auth_router = APIRouter()
@@ -44,12 +43,12 @@ role_checker = RoleChecker(["admin", "user"])
 
 
 @auth_router.post("/send_mail")
-async def send_mail(emails: EmailModel):
+async def send_mail(emails: EmailModel, background_tasks: BackgroundTasks):
     email_list = emails.email_addresses
 
     html = "<h1>Welcome to app</h1>"
 
-    send_email.delay(email_list, subject="welcome", body=html)
+    background_tasks.add_task(enqueue_mail, email_list, subject="welcome", body=html)
 
 
     return {"message": "Email sent successfully"}
@@ -57,7 +56,7 @@ async def send_mail(emails: EmailModel):
 
 @auth_router.post("/signup", status_code=status.HTTP_201_CREATED)
 async def create_user_account(
-    user_data: UserCreateModel,bg_tasks: BackgroundTasks ,session: AsyncSession = Depends(get_session)
+    user_data: UserCreateModel, background_tasks: BackgroundTasks, session: AsyncSession = Depends(get_session)
 ):
     email = user_data.email
     
@@ -78,11 +77,7 @@ async def create_user_account(
     <h1> Verify Your Email</h1>
     <p> Please Click this<a href="{link}">link</a> to verify your email</p>
     """
-    message = CreateMessage(
-        recipient=[email], subject="Verify your Email", body=html_message
-    )
-
-    bg_tasks.add_task( mail.send_message, message)
+    background_tasks.add_task(enqueue_mail, [email], subject="Verify your Email", body=html_message)
 
     return {
         "message": "Account Created Successfully check email to verify account",
@@ -124,14 +119,13 @@ async def login_user(
 
     user = await user_service.get_user_by_username(username, session)
 
-    if user is not None:
-        password_valid = verify_pass(password, user.password_hash)
-
-        if password_valid:
-            access_token = create_access_token({"email": user.email, "user_uid": str(user.id), "role": user.role})
+    if user is not None and await password_hasher.verify(password, user.password_hash):
+        if password_hasher.needs_rehash(user.password_hash):
+            new_hash = await password_hasher.hash(password)
+            await user_service.rehash_password(user, new_hash, session)
 
-        
-        refresh_token = create_access_token({"email": user.email, "user_uid": str(user.id)}, refresh=True, expiry=timedelta(days=2))
+        access_token = create_access_token(user_token_claims(user))
+        refresh_token = create_access_token(user_token_claims(user), refresh=True, expiry=timedelta(days=2))
 
         response = JSONResponse(content={"message": "Login successful", "access_token": access_token})
         response.set_cookie(key="refresh_token", value=refresh_token, httponly=True, secure=True, samesite='strict')
@@ -155,12 +149,16 @@ async def get_new_access_token(token_details: dict = Depends(RefreshTokenBearer(
 
 
 @auth_router.get("/me", response_model=UserViewModel)
-async def get_me(user=Depends(get_current_user), _: bool = Depends(role_checker)):
-    return user
+async def get_me(
+    user=Depends(get_current_user),
+    _: bool = Depends(role_checker),
+    session: AsyncSession = Depends(get_read_session),
+):
+    return await user_service.get_user_by_email(user.email, session, options=USER_VIEW_LOAD)
 
 
 @auth_router.get("/logout")
-async def revoke_token(token_details: dict = Depends(AccessTokenBearer())):
+async def revoke_token(token_details: dict = Depends(access_token_bearer)):
     jti = token_details["jti"]
 
     await add_jti_to_blocklist(jti)
@@ -171,7 +169,7 @@ async def revoke_token(token_details: dict = Depends(AccessTokenBearer())):
 
 
 @auth_router.post('/password-reset-request')
-async def password_reset_request(email_data : PasswordResetRequestModel):
+async def password_reset_request(email_data : PasswordResetRequestModel, background_tasks: BackgroundTasks):
     email = email_data.email
 
     token = create_url_safe_token({"email": email})
@@ -181,11 +179,7 @@ async def password_reset_request(email_data : PasswordResetRequestModel):
     <h1> Reset your password</h1>
     <p> Please Click this<a href="{link}">link</a> to reset your password</p>
     """
-    message = CreateMessage(
-        recipient=[email], subject="Verify your Email", body=html_message
-    )
-
-    await mail.send_message(message)
+    background_tasks.add_task(enqueue_mail, [email], subject="Verify your Email", body=html_message)
 
     return {
         "message": "Please check your email for instrauctions to reset your password",
@@ -210,7 +204,7 @@ async def reset_account_password(token: str, passwords :PasswordResetConfirmMode
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
             )
-        passwd_hash = generate_pass_hash(new_password)
+        passwd_hash = await password_hasher.hash(new_password)
         await user_service.update_user(user, {"password_hash": passwd_hash}, session)
 
         return {"message": "Password update successfully", "user": user}
@@ -62,6 +62,14 @@ class UserViewModel(BaseModel):
     reviews : List[ReviewModel]
 
 
+class TokenUserModel(BaseModel):
+    id: uuid.UUID
+    email: EmailStr
+    role: str
+    is_verified: bool
+    token_version: int
+
+
 class EmailModel(BaseModel):
     email_addresses : List[EmailStr]
 
@@ -2,13 +2,30 @@
 from sqlalchemy import false
 from db.models import User
 from .schemas import UserCreateModel
-from .utils import generate_pass_hash
+from .utils import password_hasher
+from db.redis import set_token_version
+import uuid
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select
+from sqlalchemy.orm import selectinload
+from sqlalchemy.exc import IntegrityError
+from fastapi import HTTPException, status
+
+
+# Load profile for UserViewModel responses
+USER_VIEW_LOAD = (selectinload(User.books), selectinload(User.reviews))
+
+# Changing any of these invalidates the user's outstanding tokens
+TOKEN_VERSIONED_FIELDS = {"role", "is_verified", "password_hash"}
+
 
 class UserService:
-    async def get_user_by_email(self, email: str, session:AsyncSession):
+    async def get_user_by_email(self, email: str, session:AsyncSession, options: tuple = ()):
         statement = select(User).where(User.email == email)
+        if options:
+            # The user may already sit in the identity map without these
+            # relationships, populate_existing makes the loaders apply
+            statement = statement.options(*options).execution_options(populate_existing=True)
 
         result = await session.exec(statement)
 
@@ -25,6 +42,13 @@ class UserService:
 
         return user
     
+    async def get_token_version(self, user_uid: str, session: AsyncSession):
+        statement = select(User.token_version).where(User.id == uuid.UUID(str(user_uid)))
+
+        result = await session.exec(statement)
+
+        return result.first()
+
     async def user_exists(self, email:str, session: AsyncSession):
         user = await self.get_user_by_email(email, session)
 
@@ -36,18 +60,43 @@ class UserService:
         new_user = User(
             **user_data_dict
         )
-        print(user_data_dict['password'])
 
-        new_user.password_hash= str(generate_pass_hash(user_data_dict['password']))
+        new_user.password_hash= str(await password_hasher.hash(user_data_dict['password']))
         new_user.role = "user"
         session.add(new_user)
-        await session.commit()
+        try:
+            await session.commit()
+        except IntegrityError:
+            # The unique indexes catch what the email pre-check cannot: a taken
+            # username or a concurrent signup with the same email
+            await session.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="User with email or username already exists",
+            )
+
+        # A missing key then means an evicted one, see TokenBearer.token_version_stale
+        await set_token_version(str(new_user.id), new_user.token_version)
         return new_user
     
     async def update_user(self, user:User ,user_data:dict , session: AsyncSession ):
         for k,v in user_data.items():
             setattr(user, k, v)
 
+        bump_version = TOKEN_VERSIONED_FIELDS.intersection(user_data)
+        if bump_version:
+            user.token_version += 1
+
+        await session.commit()
+
+        if bump_version:
+            await set_token_version(str(user.id), user.token_version)
+
+        return user
+
+    async def rehash_password(self, user:User, password_hash:str, session: AsyncSession):
+        # Same password under new cost parameters, outstanding tokens stay valid
+        user.password_hash = password_hash
         await session.commit()
 
         return user
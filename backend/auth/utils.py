@@ -1,7 +1,12 @@
 
 from datetime import timedelta
 from datetime import datetime, timezone
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import hashlib
 import logging
+import time
 from typing import Optional
 import jwt, uuid
 from itsdangerous import URLSafeTimedSerializer
@@ -9,6 +14,7 @@ from jwt.exceptions import ExpiredSignatureError, DecodeError
 from fastapi import HTTPException
 from passlib.context import CryptContext
 from config import Config
+from metrics import registry
 from pydantic import BaseModel, EmailStr, ValidationError
 import os
 
@@ -17,8 +23,8 @@ import os
 
 
 password_context = CryptContext(
-    schemes=['bcrypt']
-
+    schemes=['bcrypt'],
+    bcrypt__rounds=Config.BCRYPT_ROUNDS,
 )
 def generate_pass_hash(password: str):
     hash = password_context.hash(str(password))
@@ -28,6 +34,51 @@ def generate_pass_hash(password: str):
 def verify_pass(password: str, hash:str):
     return password_context.verify(str(password), str(hash))
 
+
+class PasswordHasher:
+    """Runs bcrypt on a bounded thread pool so it never blocks the event loop.
+
+    bcrypt releases the GIL while hashing, so threads give real parallelism
+    without the pickling cost of a process pool.
+    """
+
+    def __init__(self, max_workers: int):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._in_flight = 0
+
+    @property
+    def queue_depth(self) -> int:
+        # Calls submitted and not yet finished, running ones included
+        return self._in_flight
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        self._in_flight += 1
+        try:
+            return await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            self._in_flight -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(generate_pass_hash, password)
+
+    async def verify(self, password: str, hash: str) -> bool:
+        return await self._run(verify_pass, password, hash)
+
+    def needs_rehash(self, hash: str) -> bool:
+        return password_context.needs_update(hash)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher(Config.PASSWORD_HASH_WORKERS)
+
+registry.gauge(
+    "password_hash_queue_depth", "bcrypt calls waiting or running",
+    lambda: password_hasher.queue_depth,
+)
+
 def validate_email(email: str) -> str:
     
     class EmailModel(BaseModel):
@@ -41,6 +92,17 @@ def validate_email(email: str) -> str:
 
 
 
+def user_token_claims(user) -> dict:
+    # Everything RoleChecker needs, so stateless mode can skip the user lookup
+    return {
+        "email": user.email,
+        "user_uid": str(user.id),
+        "role": user.role,
+        "is_verified": bool(user.is_verified),
+        "token_version": user.token_version,
+    }
+
+
 def create_access_token(user_data: dict, expiry: Optional[timedelta]= None , refresh : Optional[bool] = False):
     
 
@@ -64,13 +126,57 @@ def create_access_token(user_data: dict, expiry: Optional[timedelta]= None , ref
     return token
 
 
+class VerifiedTokenCache:
+    """Bounded LRU of tokens whose signature already checked out.
+
+    Keyed by the token's SHA-256 so raw tokens are not kept in memory,
+    entries are dropped once the token's own `exp` has passed.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: OrderedDict = OrderedDict()
+
+    def get(self, token: str) -> Optional[dict]:
+        key = hashlib.sha256(token.encode()).digest()
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        if entry.get('exp', 0) <= time.time():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, token: str, token_data: dict) -> None:
+        if self.maxsize <= 0:
+            return
+
+        key = hashlib.sha256(token.encode()).digest()
+        self._entries[key] = token_data
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+
+verified_tokens = VerifiedTokenCache(Config.TOKEN_CACHE_SIZE)
+
+
 def decode_token(token: str)->dict:
+    # Cached claims are shared between requests, callers must not mutate them
+    token_data = verified_tokens.get(token)
+    if token_data is not None:
+        return token_data
+
     try:
         token_data = jwt.decode(
             jwt=token,
             key=Config.JWT_SECRET,
             algorithms=[Config.JWT_ALGORITHM]
         )
+        verified_tokens.put(token, token_data)
         return token_data
     except ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token has expired. Please log in again.")
@@ -0,0 +1,131 @@
+"""Micro-benchmark of the authentication dependency chain.
+
+Run from backend/:
+
+    python -m benchmarks.auth_chain
+    python -m benchmarks.auth_chain --requests 20000 --database-url sqlite+aiosqlite:///bench.db
+
+Times a route guarded like the books routes (access_token_bearer plus
+RoleChecker through get_current_principal) against the same route without
+dependencies, with the verified token cache on and off and with stateless
+auth on and off. Also counts JWT signature checks per request. Redis is
+always the in-process fake, with the blocklist subscription live.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from benchmarks.run import call_asgi, percentile, save_result, settle_env, use_fakeredis
+
+
+async def time_route(app, path: str, headers: dict, requests: int) -> list:
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        status = await call_asgi(app, "GET", path, headers)
+        latencies.append(time.perf_counter() - start)
+        if status != 200:
+            raise RuntimeError(f"GET {path} returned {status}")
+    return latencies
+
+
+def summarize_us(latencies: list) -> dict:
+    values = sorted(latencies)
+    return {
+        "mean_us": round(sum(values) / len(values) * 1e6, 1),
+        "p50_us": round(percentile(values, 50) * 1e6, 1),
+        "p95_us": round(percentile(values, 95) * 1e6, 1),
+    }
+
+
+async def run(args) -> dict:
+    import jwt
+    from fastapi import Depends, FastAPI
+    from auth.dependecies import RoleChecker, access_token_bearer
+    from auth.service import UserService
+    from auth.utils import create_access_token, user_token_claims, verified_tokens
+    from benchmarks.seed import seed
+    from config import Config
+    from db.main import AsyncSessionLocal, init_db
+    from db.redis import blocklist_cache
+
+    use_fakeredis()
+    if args.database_url.startswith("sqlite"):
+        await init_db()
+    seeded = await seed(1, 0, 0, random.Random(args.seed))
+    async with AsyncSessionLocal() as session:
+        user = await UserService().get_user_by_username(seeded["usernames"][0], session)
+    headers = {"Authorization": f"Bearer {create_access_token(user_token_claims(user))}"}
+
+    await blocklist_cache.start()
+    while not blocklist_cache.ready:
+        await asyncio.sleep(0.01)
+
+    app = FastAPI()
+    role_checker = RoleChecker(["admin", "user"])
+
+    @app.get("/bare")
+    async def bare():
+        return {}
+
+    @app.get("/chain")
+    async def chain(token_details=Depends(access_token_bearer), _: bool = Depends(role_checker)):
+        return {}
+
+    # Every signature check goes through jwt.decode
+    decodes = 0
+    decode = jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        nonlocal decodes
+        decodes += 1
+        return decode(*args, **kwargs)
+
+    jwt.decode = counting_decode
+    cache_size = verified_tokens.maxsize
+    variants = {}
+    try:
+        await time_route(app, "/bare", headers, args.warmup)
+        bare_latencies = await time_route(app, "/bare", headers, args.requests)
+        for stateless in (True, False):
+            for token_cache in (True, False):
+                Config.STATELESS_AUTH = stateless
+                verified_tokens.maxsize = cache_size if token_cache else 0
+                verified_tokens._entries.clear()
+
+                await time_route(app, "/chain", headers, args.warmup)
+                decodes = 0
+                latencies = await time_route(app, "/chain", headers, args.requests)
+                name = f"{'stateless' if stateless else 'user_lookup'}_{'cache' if token_cache else 'no_cache'}"
+                variants[name] = {
+                    **summarize_us(latencies),
+                    "chain_us": round((sum(latencies) - sum(bare_latencies)) / args.requests * 1e6, 1),
+                    "decodes_per_request": round(decodes / args.requests, 3),
+                }
+    finally:
+        jwt.decode = decode
+        await blocklist_cache.stop()
+
+    return {"bare": summarize_us(bare_latencies), "variants": variants}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the auth dependency chain")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL") or "sqlite+aiosqlite:///bench.db")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="result file, defaults to benchmarks/results/<time>-auth_chain-<commit>.json")
+    args = parser.parse_args()
+
+    settle_env(args.database_url)
+    result = asyncio.run(run(args))
+    config = {"database": args.database_url.split("://", 1)[0], "requests": args.requests}
+    output = save_result(config, result, args.output, name="auth_chain")
+    print(json.dumps({"output": str(output), **result}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Throughput of the mail queue through a real Celery worker.
+
+Run from backend/:
+
+    python -m benchmarks.celery_throughput --broker-url redis://localhost:6379/15
+    python -m benchmarks.celery_throughput --recipients 20000 --concurrency 8 --prefetch 4 --smtp-ms 20
+    python -m benchmarks.celery_throughput --broker-url memory://
+
+Enqueues mail for --recipients addresses through enqueue_mail (one task per
+MAIL_BATCH_SIZE recipients) and times an in-process worker draining the
+mail queue. SMTP is replaced by a stub that sleeps --smtp-ms per message,
+so the numbers are about queueing and task overhead, not a mail server.
+The broker defaults to REDIS_URL; point it at a scratch database, queued
+tasks left over from a failed run are consumed by the next one. memory://
+needs no server but only smoke-tests the setup: its polling consumer sends
+late acks between two-second drain timeouts, which caps throughput at
+about concurrency * prefetch / 2 tasks per second. The task's rate limit
+caps throughput on its own and is lifted unless --rate-limit is given.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from benchmarks.run import save_result, settle_env
+
+
+class StubMailer:
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.messages = 0
+        self.recipients = 0
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+        self.expected = None
+
+    def send(self, message, recipients: list[str]):
+        time.sleep(self.delay)
+        with self.lock:
+            self.messages += 1
+            self.recipients += len(recipients)
+            if self.expected is not None and self.messages >= self.expected:
+                self.done.set()
+
+    def close(self):
+        pass
+
+
+def run(args) -> dict:
+    from celery.contrib.testing.worker import start_worker
+    import celery_tasks
+    from config import Config
+
+    app = celery_tasks.c_app
+    app.conf.broker_url = args.broker_url
+    app.conf.result_backend = "cache+memory://"
+    app.conf.worker_prefetch_multiplier = args.prefetch
+    celery_tasks.send_email.rate_limit = args.rate_limit
+
+    stub = StubMailer(args.smtp_ms / 1000)
+    celery_tasks.mailer = stub
+    recipients = [f"bench_{i}@example.com" for i in range(args.recipients)]
+    tasks = -(-len(recipients) // Config.MAIL_BATCH_SIZE)
+
+    with start_worker(app, pool="threads", concurrency=args.concurrency, perform_ping_check=False,
+                      loglevel="WARNING", shutdown_timeout=30):
+        stub.expected = tasks
+        start = time.perf_counter()
+        celery_tasks.enqueue_mail(recipients, subject="Benchmark", body="<p>Benchmark</p>")
+        enqueued = time.perf_counter() - start
+        if not stub.done.wait(args.timeout):
+            raise RuntimeError(f"only {stub.messages} of {tasks} tasks finished in {args.timeout}s")
+        elapsed = time.perf_counter() - start
+
+    return {
+        "tasks": tasks,
+        "enqueue_s": round(enqueued, 3),
+        "drain_s": round(elapsed, 3),
+        "tasks_per_s": round(tasks / elapsed, 1),
+        "recipients_per_s": round(stub.recipients / elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Celery mail queue")
+    parser.add_argument("--broker-url", help="defaults to REDIS_URL")
+    parser.add_argument("--recipients", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=4, help="worker threads")
+    parser.add_argument("--prefetch", type=int, default=None, help="worker_prefetch_multiplier, defaults to the config")
+    parser.add_argument("--smtp-ms", type=float, default=10.0, help="simulated time per SMTP send")
+    parser.add_argument("--rate-limit", default=None, help="send_email rate limit, e.g. 60/m; none by default")
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--output", help="result file, defaults to benchmarks/results/<time>-celery-<commit>.json")
+    args = parser.parse_args()
+
+    settle_env(os.getenv("DATABASE_URL") or "sqlite+aiosqlite:///bench.db")
+    from config import Config
+    if args.prefetch is None:
+        args.prefetch = Config.CELERY_PREFETCH_MULTIPLIER
+    if args.broker_url is None:
+        args.broker_url = Config.REDIS_URL
+
+    result = run(args)
+    config = {
+        "broker": args.broker_url.split("://", 1)[0],
+        "recipients": args.recipients,
+        "batch_size": Config.MAIL_BATCH_SIZE,
+        "concurrency": args.concurrency,
+        "prefetch": args.prefetch,
+        "smtp_ms": args.smtp_ms,
+        "rate_limit": args.rate_limit,
+    }
+    output = save_result(config, result, args.output, name="celery")
+    print(json.dumps({"output": str(output), **result}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Read latency with and without a concurrent burst of logins.
+
+Run from backend/:
+
+    python -m benchmarks.login_burst --fakeredis
+    python -m benchmarks.login_burst --fakeredis --logins 8 --duration 10 --inline-bcrypt
+
+Readers request book lists and details for --duration seconds, first alone
+and then while --logins workers log in back to back. With bcrypt on the
+hashing pool, read latency should barely move during the burst.
+--inline-bcrypt adds a third phase that runs bcrypt on the event loop, as
+before the pool existed, for comparison.
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import random
+import time
+from collections import Counter
+from benchmarks.run import Context, SCENARIOS, describe_error, save_result, settle_env, summarize, use_fakeredis
+
+
+async def timed_worker(ctx: Context, names: list, until: float, latencies: list, errors: Counter):
+    while time.perf_counter() < until:
+        try:
+            latencies.append(await SCENARIOS[ctx.rng.choice(names)](ctx))
+        except Exception as e:
+            errors[describe_error(e)[0]] += 1
+
+
+async def phase(client, seeded: dict, args, logins: int, seed: int) -> dict:
+    readers = [Context(client, seeded, random.Random(seed + i)) for i in range(args.readers)]
+    # Readers log in before the clock starts, their requests are reads only
+    await asyncio.gather(*(ctx.auth_headers() for ctx in readers))
+    loginers = [Context(client, seeded, random.Random(seed + args.readers + i)) for i in range(logins)]
+
+    read_latencies, read_errors = [], Counter()
+    login_latencies, login_errors = [], Counter()
+    start = time.perf_counter()
+    until = start + args.duration
+    await asyncio.gather(
+        *(timed_worker(ctx, ["list", "detail"], until, read_latencies, read_errors) for ctx in readers),
+        *(timed_worker(ctx, ["login"], until, login_latencies, login_errors) for ctx in loginers),
+    )
+    elapsed = time.perf_counter() - start
+    return {
+        "reads": summarize(read_latencies, read_errors, elapsed),
+        "logins": summarize(login_latencies, login_errors, elapsed),
+    }
+
+
+async def run(args) -> dict:
+    import httpx
+    from auth.utils import password_hasher
+    from benchmarks.seed import seed
+    from db.main import init_db
+
+    if args.fakeredis:
+        use_fakeredis()
+    if args.database_url.startswith("sqlite"):
+        await init_db()
+    seeded = await seed(args.users, args.books, args.reviews, random.Random(args.seed))
+
+    app = importlib.import_module("__init__").app
+    phases = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            phases["reads_only"] = await phase(client, seeded, args, 0, args.seed)
+            phases["login_burst"] = await phase(client, seeded, args, args.logins, args.seed)
+
+            if args.inline_bcrypt:
+                async def run_inline(fn, *fn_args):
+                    return fn(*fn_args)
+
+                password_hasher._run = run_inline
+                try:
+                    phases["login_burst_inline_bcrypt"] = await phase(client, seeded, args, args.logins, args.seed)
+                finally:
+                    del password_hasher._run
+
+    return {"phases": phases}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark read latency during a login burst")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL") or "sqlite+aiosqlite:///bench.db")
+    parser.add_argument("--fakeredis", action="store_true", help="use an in-process fake instead of REDIS_URL")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--books", type=int, default=1000)
+    parser.add_argument("--reviews", type=int, default=5000)
+    parser.add_argument("--readers", type=int, default=10)
+    parser.add_argument("--logins", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per phase")
+    parser.add_argument("--inline-bcrypt", action="store_true", help="also run the burst with bcrypt on the event loop")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="result file, defaults to benchmarks/results/<time>-login_burst-<commit>.json")
+    args = parser.parse_args()
+
+    settle_env(args.database_url)
+    result = asyncio.run(run(args))
+
+    from config import Config
+    config = {
+        "database": args.database_url.split("://", 1)[0],
+        "fakeredis": args.fakeredis,
+        "readers": args.readers,
+        "logins": args.logins,
+        "duration_s": args.duration,
+        "bcrypt_rounds": Config.BCRYPT_ROUNDS,
+        "hash_workers": Config.PASSWORD_HASH_WORKERS,
+    }
+    output = save_result(config, result, args.output, name="login_burst")
+    print(json.dumps({"output": str(output), **result}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+"""Seed a database and drive request mixes against the Bookly API.
+
+Run from backend/:
+
+    python -m benchmarks.run --database-url sqlite+aiosqlite:///bench.db --fakeredis
+    python -m benchmarks.run --mix list=6,detail=3,create_review=1 --requests 5000
+    python -m benchmarks.run --base-url http://127.0.0.1:8000 --database-url postgresql+asyncpg://...
+    python -m benchmarks.run --compare benchmarks/results/a.json benchmarks/results/b.json
+
+Without --base-url the app runs in-process behind httpx.ASGITransport. With
+it, requests go to a running server that must use the same database, since
+seeding writes to it directly. Results are written as JSON under
+benchmarks/results/ and tagged with the current commit.
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+# Settings the app refuses to start without; real values win
+ENV_DEFAULTS = {
+    "JWT_SECRET": "benchmark-secret",
+    "JWT_ALGORITHM": "HS256",
+    "MAIL_PORT": "587",
+    "DOMAIN": "http://localhost:8000/",
+}
+
+DEFAULT_MIX = "login=1,list=5,detail=5,create_review=2,logout=1"
+
+
+def parse_mix(value: str) -> dict:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"unknown scenario {name!r}, choose from {', '.join(SCENARIOS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    # Nearest rank, good enough at benchmark sample sizes
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def describe_error(e: Exception) -> tuple:
+    # (kind, sample): the HTTP status for rejected requests, else the exception type
+    import httpx
+
+    if isinstance(e, httpx.HTTPStatusError):
+        return f"HTTP {e.response.status_code}", e.response.text[:200]
+    return type(e).__name__, str(e)[:200]
+
+
+def summarize(latencies: list, errors: dict, elapsed: float) -> dict:
+    values = sorted(latencies)
+    return {
+        "count": len(values),
+        "errors": sum(errors.values()),
+        "error_types": dict(errors),
+        "rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+    }
+
+
+class Context:
+    def __init__(self, client, seeded: dict, rng: random.Random):
+        self.client = client
+        self.seeded = seeded
+        self.rng = rng
+        self.token = None
+
+    async def login(self) -> str:
+        from benchmarks.seed import PASSWORD
+
+        username = self.rng.choice(self.seeded["usernames"])
+        response = await self.client.post("/api/v1/auth/login", json={"username": username, "password": PASSWORD})
+        response.raise_for_status()
+        return response.json()["access_token"]
+
+    async def auth_headers(self) -> dict:
+        if self.token is None:
+            self.token = await self.login()
+        return {"Authorization": f"Bearer {self.token}"}
+
+
+# Each scenario returns the timed request; set-up calls it needs are untimed
+
+async def scenario_login(ctx: Context):
+    start = time.perf_counter()
+    await ctx.login()
+    return time.perf_counter() - start
+
+
+async def scenario_list(ctx: Context):
+    headers = await ctx.auth_headers()
+    start = time.perf_counter()
+    response = await ctx.client.get("/api/v1/books/", params={"limit": 20}, headers=headers)
+    elapsed = time.perf_counter() - start
+    response.raise_for_status()
+    return elapsed
+
+
+async def scenario_detail(ctx: Context):
+    headers = await ctx.auth_headers()
+    book_id = ctx.rng.choice(ctx.seeded["book_ids"])
+    start = time.perf_counter()
+    response = await ctx.client.get(f"/api/v1/books/{book_id}", params={"reviews_limit": 10}, headers=headers)
+    elapsed = time.perf_counter() - start
+    response.raise_for_status()
+    return elapsed
+
+
+async def scenario_create_review(ctx: Context):
+    headers = await ctx.auth_headers()
+    book_id = ctx.rng.choice(ctx.seeded["book_ids"])
+    body = {"rating": ctx.rng.randint(1, 5), "review_text": "Benchmark review"}
+    start = time.perf_counter()
+    response = await ctx.client.post(f"/api/v1/reviews/book/{book_id}", json=body, headers=headers)
+    elapsed = time.perf_counter() - start
+    response.raise_for_status()
+    return elapsed
+
+
+async def scenario_logout(ctx: Context):
+    # Revokes a token of its own so the worker's shared token stays valid
+    token = await ctx.login()
+    start = time.perf_counter()
+    response = await ctx.client.get("/api/v1/auth/logout", headers={"Authorization": f"Bearer {token}"})
+    elapsed = time.perf_counter() - start
+    response.raise_for_status()
+    return elapsed
+
+
+SCENARIOS = {
+    "login": scenario_login,
+    "list": scenario_list,
+    "detail": scenario_detail,
+    "create_review": scenario_create_review,
+    "logout": scenario_logout,
+}
+
+
+async def drive(client, seeded: dict, mix: dict, requests: int, concurrency: int, seed: int) -> dict:
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    latencies = {name: [] for name in names}
+    errors = {name: Counter() for name in names}
+    samples = {}
+    remaining = requests
+
+    async def worker(index: int):
+        nonlocal remaining
+        ctx = Context(client, seeded, random.Random(seed + index))
+        while remaining > 0:
+            remaining -= 1
+            name = ctx.rng.choices(names, weights)[0]
+            try:
+                latencies[name].append(await SCENARIOS[name](ctx))
+            except Exception as e:
+                kind, sample = describe_error(e)
+                errors[name][kind] += 1
+                samples.setdefault(name, f"{kind}: {sample}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    scenarios = {name: summarize(latencies[name], errors[name], elapsed) for name in names}
+    for name, sample in samples.items():
+        scenarios[name]["sample_error"] = sample
+    everything = [value for values in latencies.values() for value in values]
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "scenarios": scenarios,
+        "total": summarize(everything, sum(errors.values(), Counter()), elapsed),
+    }
+
+
+def use_fakeredis():
+    # Swap the shared client on every module that captured it at import time
+    import fakeredis
+    import db.redis
+    from books.cache import book_cache
+
+    client = fakeredis.FakeAsyncRedis()
+    db.redis.redis_client = client
+    db.redis.token_blocklist = client
+    db.redis.blocklist_cache.client = client
+    book_cache.client = client
+
+
+async def call_asgi(app, method: str, path: str, headers: Optional[dict] = None, query: str = "", on_body=None) -> int:
+    # Calls the app without an HTTP client in between, so micro-benchmarks
+    # time the app alone and on_body sees chunks as they are sent
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method, "scheme": "http",
+        "path": path, "raw_path": path.encode(), "query_string": query.encode(), "root_path": "",
+        "headers": [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()],
+        "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+    }
+    received = False
+    status = None
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # Never disconnects; streaming responses stop listening when done
+        await asyncio.get_running_loop().create_future()
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body" and on_body is not None:
+            on_body(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status
+
+
+def current_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def settle_env(database_url: str):
+    # Config is read at import time, so the environment is settled first
+    os.environ["DATABASE_URL"] = database_url
+    for name, value in ENV_DEFAULTS.items():
+        os.environ.setdefault(name, value)
+
+
+def save_result(config: dict, measurements: dict, output: Optional[str] = None, name: str = "") -> Path:
+    # Every benchmark writes the same envelope, tagged with the commit
+    commit = current_commit()
+    result = {"commit": commit, "timestamp": datetime.now(timezone.utc).isoformat(), "config": config, **measurements}
+    prefix = f"{name}-" if name else ""
+    path = Path(output) if output else RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}-{prefix}{commit}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(result, indent=2))
+    return path
+
+
+async def run(args) -> dict:
+    import httpx
+    from db.main import init_db
+    from benchmarks.seed import seed
+
+    if args.fakeredis:
+        use_fakeredis()
+
+    if args.database_url.startswith("sqlite"):
+        # PostgreSQL databases are expected to be migrated with alembic
+        await init_db()
+
+    rng = random.Random(args.seed)
+    seeded = await seed(args.users, args.books, args.reviews, rng)
+
+    if args.base_url:
+        async with httpx.AsyncClient(base_url=args.base_url, timeout=60) as client:
+            await drive(client, seeded, args.mix, args.warmup, args.concurrency, args.seed)
+            return await drive(client, seeded, args.mix, args.requests, args.concurrency, args.seed)
+
+    app = importlib.import_module("__init__").app
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            await drive(client, seeded, args.mix, args.warmup, args.concurrency, args.seed)
+            return await drive(client, seeded, args.mix, args.requests, args.concurrency, args.seed)
+
+
+def compare(old_path: str, new_path: str):
+    old = json.loads(Path(old_path).read_text())
+    new = json.loads(Path(new_path).read_text())
+    print(f"{old['commit']} -> {new['commit']}")
+    for name in sorted(set(old["scenarios"]) | set(new["scenarios"]) | {"total"}):
+        before = old["total"] if name == "total" else old["scenarios"].get(name)
+        after = new["total"] if name == "total" else new["scenarios"].get(name)
+        if not before or not after:
+            continue
+        changes = []
+        for metric in ("rps", "p50_ms", "p95_ms", "p99_ms"):
+            delta = (after[metric] - before[metric]) / before[metric] * 100 if before[metric] else 0.0
+            changes.append(f"{metric} {before[metric]} -> {after[metric]} ({delta:+.1f}%)")
+        print(f"  {name}: " + ", ".join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Bookly API")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL") or "sqlite+aiosqlite:///bench.db")
+    parser.add_argument("--fakeredis", action="store_true", help="use an in-process fake instead of REDIS_URL")
+    parser.add_argument("--base-url", help="benchmark a running server instead of the in-process app")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--books", type=int, default=1000)
+    parser.add_argument("--reviews", type=int, default=5000)
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="result file, defaults to benchmarks/results/<time>-<commit>.json")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="print the change between two result files")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    settle_env(args.database_url)
+    config = {
+        "target": args.base_url or "asgi",
+        "database": args.database_url.split("://", 1)[0],
+        "fakeredis": args.fakeredis,
+        "users": args.users,
+        "books": args.books,
+        "reviews": args.reviews,
+        "mix": args.mix,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+    }
+    result = asyncio.run(run(args))
+
+    output = save_result(config, result, args.output)
+    print(json.dumps({"output": str(output), "total": result["total"], "scenarios": result["scenarios"]}, indent=2))
+    for name, summary in result["scenarios"].items():
+        if summary["errors"]:
+            print(f"{name}: {summary['errors']} failed {summary['error_types']}, e.g. {summary['sample_error']}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
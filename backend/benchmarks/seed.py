@@ -0,0 +1,65 @@
+import random
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy import insert
+from db.main import AsyncSessionLocal
+from db.models import Book, Review, User, remove_timezone
+from auth.utils import generate_pass_hash
+
+
+PASSWORD = "Bench@12345"
+
+
+def _chunks(rows: list, size: int = 1000):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+async def seed(users: int, books: int, reviews: int, rng: random.Random) -> dict:
+    # Rows are generated up front and written with executemany, the same path
+    # as books/importer.py. One bcrypt hash is shared by every user.
+    run = uuid.uuid4().hex[:8]
+    now = remove_timezone(datetime.now(timezone.utc))
+    password_hash = generate_pass_hash(PASSWORD)
+
+    user_rows = [
+        {"id": uuid.uuid4(), "username": f"bench_{run}_{i}", "email": f"bench_{run}_{i}@example.com",
+         "password_hash": password_hash, "role": "user", "is_verified": True,
+         "created_at": now, "updated_at": now}
+        for i in range(users)
+    ]
+    book_rows = [
+        {"id": uuid.uuid4(), "title": f"Benchmark Book {i}", "author": f"Author {i % 97}",
+         "publisher": f"Publisher {i % 13}", "published_date": date(1990, 1, 1) + timedelta(days=i % 10000),
+         "page_count": 100 + i % 900, "language": rng.choice(["en", "fr", "de"]),
+         "user_id": user_rows[i % users]["id"], "created_at": now - timedelta(seconds=i), "updated_at": now}
+        for i in range(books)
+    ]
+
+    review_rows = []
+    aggregates = {row["id"]: {"review_count": 0, "rating_sum": 0, **{f"rating_{s}": 0 for s in range(1, 6)}} for row in book_rows}
+    for i in range(reviews):
+        book_id = book_rows[rng.randrange(books)]["id"]
+        rating = rng.randint(1, 5)
+        review_rows.append({
+            "id": uuid.uuid4(), "rating": rating, "review_text": f"Benchmark review {i}",
+            "user_id": user_rows[rng.randrange(users)]["id"], "book_id": book_id,
+            "created_at": now - timedelta(seconds=i), "updated_at": now,
+        })
+        counts = aggregates[book_id]
+        counts["review_count"] += 1
+        counts["rating_sum"] += rating
+        counts[f"rating_{rating}"] += 1
+    for row in book_rows:
+        row.update(aggregates[row["id"]])
+
+    async with AsyncSessionLocal() as session:
+        for table, rows in ((User, user_rows), (Book, book_rows), (Review, review_rows)):
+            for chunk in _chunks(rows):
+                await session.execute(insert(table), chunk)
+        await session.commit()
+
+    return {
+        "usernames": [row["username"] for row in user_rows],
+        "book_ids": [str(row["id"]) for row in book_rows],
+    }
@@ -0,0 +1,98 @@
+"""Serialization time for book lists of 1k, 10k and 100k rows.
+
+Run from backend/:
+
+    python -m benchmarks.serialization
+    python -m benchmarks.serialization --sizes 1000,10000,100000 --repeat 5
+
+Serializes the same in-memory Book objects through three paths:
+fastapi_default is what a response_model route did before (validate from
+attributes, dump to Python, jsonable_encoder, stdlib json); orjson_response
+is the same with the app's ORJSONResponse default; model_response is
+responses.dump_json, which validates once and lets pydantic-core write the
+JSON. Reported times are the best of --repeat runs.
+"""
+import argparse
+import json
+import os
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from benchmarks.run import save_result, settle_env
+
+
+def make_books(count: int) -> list:
+    from db.models import Book
+
+    now = datetime(2024, 1, 1)
+    owner = uuid.uuid4()
+    return [
+        Book(id=uuid.uuid4(), title=f"Benchmark Book {i}", author=f"Author {i % 97}", publisher=f"Publisher {i % 13}",
+             published_date=date(1990, 1, 1) + timedelta(days=i % 10000), page_count=100 + i % 900, language="en",
+             user_id=owner, review_count=i % 50, rating_sum=(i % 50) * 4, created_at=now - timedelta(seconds=i),
+             updated_at=now)
+        for i in range(count)
+    ]
+
+
+def serializers() -> dict:
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse, ORJSONResponse
+    from books.schemas import BookModel
+    from responses import dump_json, type_adapter
+
+    schema = list[BookModel]
+    adapter = type_adapter(schema)
+
+    def fastapi_default(books) -> bytes:
+        value = adapter.dump_python(adapter.validate_python(books, from_attributes=True), mode="json")
+        return JSONResponse(jsonable_encoder(value)).body
+
+    def orjson_response(books) -> bytes:
+        value = adapter.dump_python(adapter.validate_python(books, from_attributes=True), mode="json")
+        return ORJSONResponse(jsonable_encoder(value)).body
+
+    def model_response(books) -> bytes:
+        return dump_json(schema, books)
+
+    return {"fastapi_default": fastapi_default, "orjson_response": orjson_response, "model_response": model_response}
+
+
+def best_of(fn, books, repeat: int) -> tuple:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = fn(books)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, len(body)
+
+
+def run(sizes: list, repeat: int) -> dict:
+    paths = serializers()
+    results = {}
+    for size in sizes:
+        books = make_books(size)
+        results[str(size)] = {}
+        for name, fn in paths.items():
+            elapsed, length = best_of(fn, books, repeat)
+            results[str(size)][name] = {"ms": round(elapsed * 1000, 2), "bytes": length}
+    return {"sizes": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark book list serialization")
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="result file, defaults to benchmarks/results/<time>-serialization-<commit>.json")
+    args = parser.parse_args()
+
+    settle_env(os.getenv("DATABASE_URL") or "sqlite+aiosqlite:///bench.db")
+    sizes = [int(size) for size in args.sizes.split(",")]
+    result = run(sizes, args.repeat)
+    output = save_result({"sizes": sizes, "repeat": args.repeat}, result, args.output, name="serialization")
+    print(json.dumps({"output": str(output), **result}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
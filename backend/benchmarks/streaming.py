@@ -0,0 +1,141 @@
+"""Peak RSS and time to first byte of the full book list, streamed or not.
+
+Run from backend/:
+
+    python -m benchmarks.streaming --fakeredis
+    python -m benchmarks.streaming --fakeredis --books 200000
+
+Compares GET /books/?stream=json and ?stream=ndjson with the unstreamed
+path they replaced: every Book loaded as an ORM object, validated into
+list[BookModel] and serialized by FastAPI in one piece. Each variant runs
+in a fresh process so ru_maxrss is its own high-water mark; the reported
+peak is the growth over a process that has imported the app and served
+one small request.
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+from benchmarks.run import call_asgi, save_result, settle_env, use_fakeredis
+
+
+VARIANTS = {
+    "materialized": ("/bench/books-materialized", ""),
+    "stream_json": ("/api/v1/books/", "stream=json"),
+    "stream_ndjson": ("/api/v1/books/", "stream=ndjson"),
+}
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def add_materialized_route(app):
+    # The list endpoint as it was before streaming, for comparison
+    from fastapi import Depends
+    from fastapi.responses import JSONResponse
+    from sqlmodel import desc, select
+    from auth.dependecies import RoleChecker, access_token_bearer
+    from books.schemas import BookModel
+    from db.main import get_read_session
+    from db.models import Book
+
+    role_checker = RoleChecker(["admin", "user"])
+
+    @app.get("/bench/books-materialized", response_model=list[BookModel], response_class=JSONResponse)
+    async def books_materialized(session=Depends(get_read_session), token_details=Depends(access_token_bearer),
+                                 _: bool = Depends(role_checker)):
+        return (await session.exec(select(Book).order_by(desc(Book.created_at), desc(Book.id)))).all()
+
+
+async def measure(variant: str, token: str, fakeredis: bool) -> dict:
+    if fakeredis:
+        use_fakeredis()
+    app = importlib.import_module("__init__").app
+    add_materialized_route(app)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    async with app.router.lifespan_context(app):
+        # Imports, pools and caches are in place before the baseline
+        await call_asgi(app, "GET", "/api/v1/books/", headers, "limit=1")
+        baseline = peak_rss_mb()
+
+        path, query = VARIANTS[variant]
+        size = 0
+        first_byte = None
+
+        def on_body(chunk: bytes):
+            nonlocal size, first_byte
+            if chunk and first_byte is None:
+                first_byte = time.perf_counter()
+            size += len(chunk)
+
+        start = time.perf_counter()
+        status = await call_asgi(app, "GET", path, headers, query, on_body)
+        total = time.perf_counter() - start
+
+    if status != 200:
+        raise RuntimeError(f"{variant} returned {status}")
+    return {
+        "ttfb_ms": round((first_byte - start) * 1000, 1),
+        "total_ms": round(total * 1000, 1),
+        "bytes": size,
+        "peak_rss_growth_mb": round(peak_rss_mb() - baseline, 1),
+    }
+
+
+async def prepare(args) -> str:
+    from auth.utils import create_access_token, user_token_claims
+    from auth.service import UserService
+    from benchmarks.seed import seed
+    from db.main import AsyncSessionLocal, init_db
+
+    if args.fakeredis:
+        use_fakeredis()
+    if args.database_url.startswith("sqlite"):
+        await init_db()
+    seeded = await seed(args.users, args.books, 0, random.Random(args.seed))
+    async with AsyncSessionLocal() as session:
+        user = await UserService().get_user_by_username(seeded["usernames"][0], session)
+    return create_access_token(user_token_claims(user))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark streamed against materialized book lists")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL") or "sqlite+aiosqlite:///bench.db")
+    parser.add_argument("--fakeredis", action="store_true", help="use an in-process fake instead of REDIS_URL")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--books", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="result file, defaults to benchmarks/results/<time>-streaming-<commit>.json")
+    parser.add_argument("--child", choices=VARIANTS, help=argparse.SUPPRESS)
+    parser.add_argument("--token", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    settle_env(args.database_url)
+    if args.child:
+        print(json.dumps(asyncio.run(measure(args.child, args.token, args.fakeredis))))
+        return
+
+    token = asyncio.run(prepare(args))
+    variants = {}
+    for variant in VARIANTS:
+        command = [sys.executable, "-m", "benchmarks.streaming", "--database-url", args.database_url,
+                   "--child", variant, "--token", token] + (["--fakeredis"] if args.fakeredis else [])
+        completed = subprocess.run(command, capture_output=True, text=True, check=True)
+        variants[variant] = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    config = {"database": args.database_url.split("://", 1)[0], "books": args.books}
+    output = save_result(config, {"variants": variants}, args.output, name="streaming")
+    print(json.dumps({"output": str(output), "variants": variants}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+from config import Config
+from db.redis import redis_client
+from metrics import registry
+
+
+# Bump when the cached response shape changes so old entries are never read
+CACHE_VERSION = 3
+
+CACHE_REQUESTS = registry.counter(
+    "book_cache_requests_total", "Book response cache lookups", ("cache", "result")
+)
+
+
+class BookCache:
+    """Read-through cache of serialized book responses.
+
+    Detail and list keys embed a generation number that every write
+    increments, per book and for all lists respectively. Stale entries
+    simply stop being addressed and age out through their TTL, including
+    ones a load that read the row before the write stores after it.
+    """
+
+    def __init__(self, client, ttl: int, enabled: bool = True):
+        self.client = client
+        self.ttl = ttl
+        self.enabled = enabled
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    def detail_generation_key(self, book_id) -> str:
+        # No TTL: numbering restarting at 0 could address an entry still alive
+        return f"books:v{CACHE_VERSION}:detail_gen:{book_id}"
+
+    async def detail_key(self, book_id) -> str:
+        generation = await self.client.get(self.detail_generation_key(book_id))
+        return f"books:v{CACHE_VERSION}:detail:{book_id}:{int(generation or 0)}"
+
+    def list_generation_key(self) -> str:
+        return f"books:v{CACHE_VERSION}:list_gen"
+
+    async def list_key(self, *parts) -> str:
+        generation = await self.client.get(self.list_generation_key())
+        suffix = ":".join(str(part) for part in parts)
+        return f"books:v{CACHE_VERSION}:list:{int(generation or 0)}:{suffix}"
+
+    async def get_or_load(self, cache: str, key: Optional[str], loader: Callable[[], Awaitable[str]], field: Optional[str] = None) -> str:
+        # With a field the entry lives in a hash, so all variants of one book
+        # are dropped together by a single DEL
+        if not self.enabled or key is None:
+            return await loader()
+
+        try:
+            if field is None:
+                cached = await self.client.get(key)
+            else:
+                cached = await self.client.hget(key, field)
+        except Exception as e:
+            logging.warning(f"Book cache read failed: {str(e)}")
+            return await loader()
+
+        if cached is not None:
+            CACHE_REQUESTS.inc(cache, "hit")
+            return cached.decode()
+        CACHE_REQUESTS.inc(cache, "miss")
+
+        # Single flight: concurrent misses on one key share a single load
+        flight_key = key if field is None else f"{key}#{field}"
+        inflight = self._inflight.get(flight_key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[flight_key] = future
+        try:
+            value = await loader()
+            try:
+                if field is None:
+                    await self.client.set(key, value, ex=self.ttl)
+                else:
+                    pipe = self.client.pipeline(transaction=False)
+                    pipe.hset(key, field, value)
+                    pipe.expire(key, self.ttl)
+                    await pipe.execute()
+            except Exception as e:
+                logging.warning(f"Book cache write failed: {str(e)}")
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # waiters re-raise it, don't warn if there are none
+            raise
+        finally:
+            del self._inflight[flight_key]
+
+    async def list_key_or_none(self, *parts) -> Optional[str]:
+        return await self._key_or_none(lambda: self.list_key(*parts))
+
+    async def detail_key_or_none(self, book_id) -> Optional[str]:
+        return await self._key_or_none(lambda: self.detail_key(book_id))
+
+    async def _key_or_none(self, make_key: Callable[[], Awaitable[str]]) -> Optional[str]:
+        if not self.enabled:
+            return None
+        try:
+            return await make_key()
+        except Exception as e:
+            logging.warning(f"Book cache read failed: {str(e)}")
+            return None
+
+    async def invalidate(self, book_id=None, lists: bool = True):
+        if not self.enabled:
+            return
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            if book_id is not None:
+                pipe.incr(self.detail_generation_key(book_id))
+            if lists:
+                pipe.incr(self.list_generation_key())
+            await pipe.execute()
+        except Exception as e:
+            logging.error(f"Book cache invalidation failed: {str(e)}")
+
+
+book_cache = BookCache(redis_client, ttl=Config.BOOK_CACHE_TTL, enabled=Config.BOOK_CACHE_ENABLED)
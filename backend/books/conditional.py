@@ -0,0 +1,62 @@
+import hashlib
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Awaitable, Callable
+from fastapi import Request, Response, status
+
+
+def build_validators(rows, *variant) -> dict:
+    # rows expose id, updated_at and review_count; the count is part of the
+    # tag because embedded reviews and aggregates change with it
+    digest = hashlib.sha1()
+    last_modified = None
+    for row in rows:
+        digest.update(f"{row.id}:{row.updated_at.isoformat()}:{row.review_count};".encode())
+        if last_modified is None or row.updated_at > last_modified:
+            last_modified = row.updated_at
+    for part in variant:
+        digest.update(f"|{part}".encode())
+
+    return {
+        "etag": f'W/"{digest.hexdigest()[:32]}"',
+        # updated_at is stored as naive UTC
+        "last_modified": format_datetime(last_modified.replace(tzinfo=timezone.utc), usegmt=True) if last_modified else None,
+    }
+
+
+def is_not_modified(request: Request, validators: dict) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match takes precedence over If-Modified-Since (RFC 9110 13.2.2)
+        if if_none_match.strip() == "*":
+            return True
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return validators["etag"].removeprefix("W/") in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and validators["last_modified"]:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            return False
+        return parsedate_to_datetime(validators["last_modified"]) <= since
+    return False
+
+
+async def conditional_response(
+    request: Request,
+    validators: dict,
+    load_body: Callable[[], Awaitable[str]],
+    cache_control: str,
+    media_type: str = "application/json",
+) -> Response:
+    headers = {"ETag": validators["etag"], "Cache-Control": cache_control}
+    if validators["last_modified"]:
+        headers["Last-Modified"] = validators["last_modified"]
+
+    # The body loader is never awaited on the 304 path
+    if is_not_modified(request, validators):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=await load_body(), media_type=media_type, headers=headers)
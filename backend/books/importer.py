@@ -0,0 +1,170 @@
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import runpy
+import uuid
+from datetime import datetime, timezone
+from typing import AsyncIterator, Iterable
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlmodel.ext.asyncio.session import AsyncSession
+from config import Config
+from db.main import AsyncSessionLocal
+from db.models import Book, remove_timezone
+from .cache import book_cache
+from .schemas import BookCreateModel
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    # Re-split an arbitrary byte stream into lines without buffering the whole
+    # body. Lines stay bytes so a bad encoding is reported against its row.
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+    if buffer:
+        yield buffer
+
+
+async def iter_records(lines: AsyncIterator[bytes], fmt: str) -> AsyncIterator[tuple]:
+    # Yields (line_number, record) where record is a dict or the parse error
+    header = None
+    line_no = 0
+    async for raw_line in lines:
+        line_no += 1
+        try:
+            line = raw_line.decode("utf-8").rstrip("\r")
+        except UnicodeDecodeError as e:
+            yield line_no, ValueError(f"invalid UTF-8: {str(e)}")
+            continue
+        if not line.strip():
+            continue
+
+        if fmt == "csv":
+            row = next(csv.reader([line]))
+            if header is None:
+                header = [column.strip() for column in row]
+                continue
+            if len(row) != len(header):
+                yield line_no, ValueError(f"expected {len(header)} columns, got {len(row)}")
+                continue
+            yield line_no, dict(zip(header, row))
+        else:
+            try:
+                yield line_no, json.loads(line)
+            except ValueError as e:
+                yield line_no, e
+
+
+async def _aiter(items: Iterable) -> AsyncIterator:
+    for item in items:
+        yield item
+
+
+# Bind parameters per INSERT, under asyncpg's limit of 32767
+MAX_INSERT_PARAMS = 32000
+
+
+async def _insert_batch(rows: list[dict], session: AsyncSession) -> int:
+    # Rows go into the statement as a multi-row VALUES list. Passed as
+    # execute() parameters they'd be an executemany instead, which asyncpg
+    # runs as one INSERT per row when there is no RETURNING.
+    rows_per_insert = max(1, MAX_INSERT_PARAMS // len(rows[0]))
+    for start in range(0, len(rows), rows_per_insert):
+        await session.execute(insert(Book).values(rows[start:start + rows_per_insert]))
+    await session.commit()
+    return len(rows)
+
+
+async def import_books(records: AsyncIterator[tuple], user_id, session: AsyncSession) -> dict:
+    user_id = uuid.UUID(str(user_id))
+    batch = []
+    batch_start = 0
+    inserted = 0
+    failed = 0
+    errors = []
+    aborted = False
+
+    def add_error(line_no: int, error: str):
+        if len(errors) < Config.BOOK_IMPORT_MAX_ERRORS:
+            errors.append({"line": line_no, "error": error})
+
+    async def flush(last_line: int) -> bool:
+        # Earlier batches are already committed; a failing one is rolled back
+        # and the import stops so the caller gets the counts so far
+        nonlocal inserted, failed
+        try:
+            inserted += await _insert_batch(batch, session)
+            return True
+        except Exception as e:
+            await session.rollback()
+            logging.error(f"Book import batch {batch_start}-{last_line} failed: {str(e)}")
+            failed += len(batch)
+            # The driver's message, without the statement and its parameters
+            add_error(batch_start, f"batch of lines {batch_start}-{last_line} not inserted: {str(getattr(e, 'orig', e))}")
+            return False
+
+    line_no = 0
+    async for line_no, record in records:
+        try:
+            if isinstance(record, Exception):
+                raise record
+            book_data = BookCreateModel.model_validate(record)
+        except (ValidationError, ValueError, TypeError) as e:
+            failed += 1
+            add_error(line_no, str(e))
+            continue
+
+        now = remove_timezone(datetime.now(timezone.utc))
+        row = book_data.model_dump()
+        row["published_date"] = row["published_date"].date()
+        row.update(id=uuid.uuid4(), user_id=user_id, created_at=now, updated_at=now)
+        if not batch:
+            batch_start = line_no
+        batch.append(row)
+
+        if len(batch) >= Config.BOOK_IMPORT_BATCH_SIZE:
+            if not await flush(line_no):
+                aborted = True
+                break
+            batch = []
+
+    if batch and not aborted:
+        aborted = not await flush(line_no)
+
+    if inserted:
+        await book_cache.invalidate()
+
+    return {"inserted": inserted, "failed": failed, "errors": errors, "aborted": aborted}
+
+
+async def _import_file(path: str, user_id: uuid.UUID, fmt: str) -> dict:
+    async with AsyncSessionLocal() as session:
+        if path.endswith(".py"):
+            # Seed files shaped like books/book_data.py: a module level `books` list
+            records = _aiter(enumerate(runpy.run_path(path)["books"], start=1))
+            return await import_books(records, user_id, session)
+
+        with open(path, "rb") as f:
+            records = iter_records(iter_lines(_aiter(f)), fmt)
+            return await import_books(records, user_id, session)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import books from NDJSON, CSV or a book_data.py style file")
+    parser.add_argument("path")
+    parser.add_argument("--user-id", type=uuid.UUID, required=True, help="owner of the imported books")
+    parser.add_argument("--format", choices=["ndjson", "csv"], default=None)
+    args = parser.parse_args()
+
+    fmt = args.format or ("csv" if args.path.endswith(".csv") else "ndjson")
+    result = asyncio.run(_import_file(args.path, args.user_id, fmt))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import argparse
+import asyncio
+import json
+from sqlalchemy import Float, case, func, literal_column, or_, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from db.main import AsyncSessionLocal
+from db.models import Book, Review
+
+
+RATING_COLUMNS = ("rating_1", "rating_2", "rating_3", "rating_4", "rating_5")
+
+
+def average_rating_expr():
+    # Spelled out as SQL because it has to match ix_book_average_rating
+    # exactly; cast() / column would render a NUMERIC cast on the divisor
+    return literal_column("(CAST(book.rating_sum AS FLOAT) / book.review_count)", type_=Float)
+
+
+def rated_books_predicate():
+    # The partial index predicate, as a literal: a bound "> $1" cannot be
+    # proven to imply "review_count > 0" under a generic plan
+    return Book.review_count > literal_column("0")
+
+
+def rating_increment_values(rating: int) -> dict:
+    return {
+        "review_count": Book.review_count + 1,
+        "rating_sum": Book.rating_sum + rating,
+        f"rating_{rating}": getattr(Book, f"rating_{rating}") + 1,
+    }
+
+
+def review_aggregates():
+    columns = [
+        Review.book_id,
+        func.count().label("review_count"),
+        func.coalesce(func.sum(Review.rating), 0).label("rating_sum"),
+    ]
+    for stars, name in enumerate(RATING_COLUMNS, start=1):
+        columns.append(func.sum(case((Review.rating == stars, 1), else_=0)).label(name))
+    return select(*columns).group_by(Review.book_id).subquery()
+
+
+async def backfill_rating_aggregates(session: AsyncSession) -> int:
+    # Correlated subqueries keep this portable (SQLite has no UPDATE ... FROM
+    # before 3.33); it is a one-off job, not a request path
+    def recount(expression):
+        return func.coalesce(
+            select(expression).where(Review.book_id == Book.id).scalar_subquery(), 0
+        )
+
+    values = {
+        "review_count": recount(func.count()),
+        "rating_sum": recount(func.sum(Review.rating)),
+    }
+    for stars, name in enumerate(RATING_COLUMNS, start=1):
+        values[name] = recount(func.sum(case((Review.rating == stars, 1), else_=0)))
+
+    result = await session.exec(update(Book).values(**values))
+    await session.commit()
+    return result.rowcount
+
+
+async def check_rating_consistency(session: AsyncSession) -> list[dict]:
+    aggregates = review_aggregates()
+    names = ("review_count", "rating_sum") + RATING_COLUMNS
+
+    mismatch = or_(*[
+        getattr(Book, name) != func.coalesce(getattr(aggregates.c, name), 0) for name in names
+    ])
+    statement = (
+        select(Book.id, *[getattr(Book, name) for name in names], *[func.coalesce(getattr(aggregates.c, name), 0) for name in names])
+        .outerjoin(aggregates, aggregates.c.book_id == Book.id)
+        .where(mismatch)
+    )
+    result = await session.exec(statement)
+
+    mismatches = []
+    for row in result.all():
+        stored = dict(zip(names, row[1:1 + len(names)]))
+        actual = dict(zip(names, row[1 + len(names):]))
+        mismatches.append({"book_id": str(row[0]), "stored": stored, "actual": actual})
+    return mismatches
+
+
+async def _run(command: str):
+    async with AsyncSessionLocal() as session:
+        if command == "backfill":
+            return {"updated": await backfill_rating_aggregates(session)}
+        return {"mismatches": await check_rating_consistency(session)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the denormalized book rating aggregates")
+    parser.add_argument("command", choices=["backfill", "check"])
+    args = parser.parse_args()
+
+    result = asyncio.run(_run(args.command))
+    print(json.dumps(result, indent=2))
+    if args.command == "check" and result["mismatches"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,40 +1,123 @@
-from fastapi import APIRouter, status, Depends, Response
-from fastapi.exceptions import HTTPException
+from fastapi import APIRouter, status, Depends, Response, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlmodel.ext.asyncio.session import AsyncSession
-from .schemas import BookModel, BookUpdateModel, BookCreateModel, BookDetailModel
-from db.main import get_session
+from .schemas import BookModel, BookUpdateModel, BookCreateModel, BookDetailModel, BookPageModel, BookImportResultModel, BookBatchRequestModel, BookBatchResponseModel, BookSearchResultModel
+from db.main import get_session, get_read_session
 from books.service import BookService
-from db.models import Book
-from auth.dependecies import AccessTokenBearer, RoleChecker
+from books.cache import book_cache
+from books.importer import iter_lines, iter_records, import_books
+from books.search import BookSearchService
+from books.conditional import conditional_response
+from responses import model_response
+from auth.dependecies import access_token_bearer, get_current_principal, RoleChecker
+from config import Config
+from typing import Optional
+from datetime import date
+import json
 import uuid
 
 book_router = APIRouter()
 book_service = BookService()
-access_token_bearer = AccessTokenBearer()
+search_service = BookSearchService()
 role_checker_admin = RoleChecker(['admin'])
 role_checker_user =RoleChecker(['admin', 'user'])
 
-@book_router.get("/", response_model=list[BookModel])
+STREAM_MEDIA_TYPES = {"json": "application/json", "ndjson": "application/x-ndjson"}
+
+
+@book_router.get("/", response_model=BookPageModel)
 async def list_books(
-    session: AsyncSession = Depends(get_session),
+    request: Request,
+    limit: int = Query(default=Config.PAGE_SIZE_DEFAULT, ge=1),
+    cursor: Optional[str] = None,
+    stream: Optional[str] = Query(default=None, pattern="^(json|ndjson)$"),
+    session: AsyncSession = Depends(get_read_session),
+    primary_session: AsyncSession = Depends(get_session),
     token_details=Depends(access_token_bearer),
     _:bool= Depends(role_checker_user)
 ):
-    return await book_service.get_all_books(session)
+    # stream=json|ndjson returns every book unpaginated, serialized row by row
+    if stream:
+        return StreamingResponse(book_service.stream_books(stream), media_type=STREAM_MEDIA_TYPES[stream])
+
+    async def load_page() -> str:
+        page = await book_service.get_all_books(source, limit=limit, cursor=cursor)
+        return BookPageModel.model_validate(page, from_attributes=True).model_dump_json()
+
+    async def load_validators() -> str:
+        return json.dumps(await book_service.get_page_validators(source, limit=limit, cursor=cursor))
 
+    key = await book_cache.list_key_or_none(min(limit, Config.PAGE_SIZE_MAX), cursor or "")
+    # A replica behind the generation would pin old rows for the whole TTL
+    source = primary_session if key else session
+    validators = await book_cache.get_or_load("list_validators", key and f"{key}:validators", load_validators)
 
-@book_router.get("/user/{user_id}", response_model=list[BookModel])
+    async def load_body() -> str:
+        return await book_cache.get_or_load("list", key, load_page)
+
+    return await conditional_response(request, json.loads(validators), load_body, Config.BOOK_LIST_CACHE_CONTROL)
+
+
+@book_router.get("/search", response_model=BookSearchResultModel)
+async def search_books(
+    q: Optional[str] = None,
+    language: Optional[str] = None,
+    publisher: Optional[str] = None,
+    published_from: Optional[date] = None,
+    published_to: Optional[date] = None,
+    limit: int = Query(default=Config.PAGE_SIZE_DEFAULT, ge=1),
+    session: AsyncSession = Depends(get_read_session),
+    token_details=Depends(access_token_bearer),
+    _:bool= Depends(role_checker_user)
+):
+    result = await search_service.search_books(
+        session,
+        q=q,
+        language=language,
+        publisher=publisher,
+        published_from=published_from,
+        published_to=published_to,
+        limit=limit,
+    )
+    return model_response(BookSearchResultModel, result)
+
+
+@book_router.get("/top-rated", response_model=list[BookModel])
+async def list_top_rated_books(
+    min_reviews: int = Query(default=Config.TOP_RATED_MIN_REVIEWS, ge=1),
+    limit: int = Query(default=Config.PAGE_SIZE_DEFAULT, ge=1),
+    session: AsyncSession = Depends(get_read_session),
+    token_details=Depends(access_token_bearer),
+    _:bool= Depends(role_checker_user)
+):
+    books = await book_service.get_top_rated_books(session, min_reviews=min_reviews, limit=limit)
+    return model_response(list[BookModel], books)
+
+
+@book_router.get("/user/{user_id}", response_model=BookPageModel)
 async def get_user_book(
-    user_id,
-    session: AsyncSession = Depends(get_session),
+    request: Request,
+    user_id: uuid.UUID,
+    limit: int = Query(default=Config.PAGE_SIZE_DEFAULT, ge=1),
+    cursor: Optional[str] = None,
+    stream: Optional[str] = Query(default=None, pattern="^(json|ndjson)$"),
+    session: AsyncSession = Depends(get_read_session),
     token_details=Depends(access_token_bearer),
     _:bool= Depends(role_checker_user)
 ):
-    return await book_service.get_user_books(user_id , session )
+    if stream:
+        return StreamingResponse(book_service.stream_books(stream, user_id=user_id), media_type=STREAM_MEDIA_TYPES[stream])
+
+    async def load_body() -> str:
+        page = await book_service.get_user_books(user_id , session, limit=limit, cursor=cursor)
+        return BookPageModel.model_validate(page, from_attributes=True).model_dump_json()
+
+    validators = await book_service.get_page_validators(session, limit=limit, cursor=cursor, user_id=user_id)
+    return await conditional_response(request, validators, load_body, Config.BOOK_LIST_CACHE_CONTROL)
 
 
 
-@book_router.post("/", status_code=status.HTTP_201_CREATED, response_model=Book)
+@book_router.post("/", status_code=status.HTTP_201_CREATED, response_model=BookModel)
 async def create_books(
     book_data: BookCreateModel,
     session: AsyncSession = Depends(get_session),
@@ -42,7 +125,36 @@ async def create_books(
     _:bool= Depends(role_checker_user)
 ):
     user_id = token_details.get('user')['user_uid']
-    return await book_service.create_book(book_data,user_id, session)
+    new_book = await book_service.create_book(book_data,user_id, session)
+    return model_response(BookModel, new_book, status_code=status.HTTP_201_CREATED)
+
+
+@book_router.post("/batch", response_model=BookBatchResponseModel)
+async def get_books_batch(
+    batch: BookBatchRequestModel,
+    session: AsyncSession = Depends(get_read_session),
+    token_details=Depends(access_token_bearer),
+    _:bool= Depends(role_checker_user)
+):
+    result = await book_service.get_books_by_ids(batch.ids, session)
+    return model_response(BookBatchResponseModel, result)
+
+
+@book_router.post("/import", response_model=BookImportResultModel)
+async def import_books_stream(
+    request: Request,
+    format: Optional[str] = Query(default=None, pattern="^(ndjson|csv)$"),
+    session: AsyncSession = Depends(get_session),
+    token_details=Depends(access_token_bearer),
+    _:bool= Depends(role_checker_admin)
+):
+    # The body is consumed as a stream, a large catalogue never sits in memory
+    if format is None:
+        format = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+
+    user_id = token_details.get('user')['user_uid']
+    records = iter_records(iter_lines(request.stream()), format)
+    return await import_books(records, user_id, session)
 
 
 
@@ -52,17 +164,33 @@ async def create_books(
 
 @book_router.get("/{book_id}", response_model=BookDetailModel)
 async def get_book(
+    request: Request,
     book_id: uuid.UUID,
-    session: AsyncSession = Depends(get_session),
+    reviews_limit: Optional[int] = Query(default=None, ge=0, le=Config.PAGE_SIZE_MAX),
+    session: AsyncSession = Depends(get_read_session),
+    primary_session: AsyncSession = Depends(get_session),
     token_details=Depends(access_token_bearer),
     _:bool= Depends(role_checker_user)
 ):
-    book = await book_service.get_book(book_id, session)
-    if not book:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Book Not Found 😥😥"
-        )
-    return book
+    # reviews_limit=N embeds only the latest N reviews, the rest are paged
+    # through GET /reviews/book/{book_id}
+    async def load_book() -> str:
+        book = await book_service.get_book_detail(book_id, source, reviews_limit=reviews_limit)
+        return book.model_dump_json()
+
+    async def load_validators() -> str:
+        return json.dumps(await book_service.get_book_validators(book_id, source, variant))
+
+    async def load_body() -> str:
+        return await book_cache.get_or_load("detail", key, load_book, field=variant)
+
+    # Validators share the book's hash, so a write retires them with the body
+    key = await book_cache.detail_key_or_none(book_id)
+    # Entries are filled from the primary, see list_books
+    source = primary_session if key else session
+    variant = "all" if reviews_limit is None else str(reviews_limit)
+    validators = await book_cache.get_or_load("validators", key, load_validators, field=f"validators:{variant}")
+    return await conditional_response(request, json.loads(validators), load_body, Config.BOOK_DETAIL_CACHE_CONTROL)
 
 
 @book_router.delete("/{book_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -70,27 +198,22 @@ async def delete_book(
     book_id: uuid.UUID,
     session: AsyncSession = Depends(get_session),
     token_details=Depends(access_token_bearer),
-    _:bool= Depends(role_checker_admin)
+    current_user=Depends(get_current_principal),
+    _:bool= Depends(role_checker_user)
 ):
-    deleted = await book_service.delete_book(book_id, session)
-    if not deleted:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Book Not Found 😥😥"
-        )
-    return Response(content="Book deleted successfully", status_code=status.HTTP_204_NO_CONTENT)
+    # Owners may delete their own books, admins any book
+    await book_service.delete_book(book_id, current_user, session)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
-@book_router.patch("/{book_id}", response_model=BookDetailModel)
+@book_router.patch("/{book_id}", response_model=BookModel)
 async def update_book(
     book_id: uuid.UUID,
     book_update_data: BookUpdateModel,
     session: AsyncSession = Depends(get_session),
     token_details=Depends(access_token_bearer),
+    current_user=Depends(get_current_principal),
     _:bool= Depends(role_checker_user)
 ):
-    updated_book = await book_service.update_book(book_id, book_update_data, session)
-    if not updated_book:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Book Not Found 😥"
-        )
-    return updated_book
+    updated_book = await book_service.update_book(book_id, book_update_data, current_user, session)
+    return model_response(BookModel, updated_book)
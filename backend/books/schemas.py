@@ -1,12 +1,32 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, Field, computed_field
+from typing import Dict, List, Optional
 import uuid
 from datetime import datetime, timezone
 from reviews.schemas import ReviewModel
 from db.models import Book
+from config import Config
 
 
-class BookModel(BaseModel):
+class RatingAggregatesModel(BaseModel):
+    review_count: int = 0
+    rating_sum: int = 0
+    rating_1: int = Field(default=0, exclude=True)
+    rating_2: int = Field(default=0, exclude=True)
+    rating_3: int = Field(default=0, exclude=True)
+    rating_4: int = Field(default=0, exclude=True)
+    rating_5: int = Field(default=0, exclude=True)
+
+    @computed_field
+    @property
+    def average_rating(self) -> Optional[float]:
+        return round(self.rating_sum / self.review_count, 2) if self.review_count else None
+
+    @computed_field
+    @property
+    def rating_histogram(self) -> Dict[int, int]:
+        return {stars: getattr(self, f"rating_{stars}") for stars in range(1, 6)}
+
+class BookModel(RatingAggregatesModel):
     id: uuid.UUID
     title: str
     author: str
@@ -17,7 +37,19 @@ class BookModel(BaseModel):
     created_at : datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     update_at : datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
-class BookDetailModel(BaseModel):
+class BookPageModel(BaseModel):
+    items: List[BookModel]
+    next_cursor: Optional[str] = None
+
+class BookSearchHitModel(BookModel):
+    rank: float
+
+class BookSearchResultModel(BaseModel):
+    items: List[BookSearchHitModel]
+    total: int
+    facets: Dict[str, Dict[str, int]]
+
+class BookDetailModel(RatingAggregatesModel):
     id: uuid.UUID
     title: str
     author: str
@@ -26,6 +58,14 @@ class BookDetailModel(BaseModel):
     reviews : List[ReviewModel]
 
 
+class BookBatchRequestModel(BaseModel):
+    ids: List[uuid.UUID] = Field(min_length=1, max_length=Config.BOOK_BATCH_MAX_IDS)
+
+class BookBatchResponseModel(BaseModel):
+    books: List[BookDetailModel]
+    missing: List[uuid.UUID]
+
+
 class BookCreateModel(BaseModel):
     title: str
     author: str
@@ -40,4 +80,15 @@ class BookUpdateModel(BaseModel):
     publisher: Optional[str] = None
     published_date: Optional[datetime] = None
     page_count: Optional[int] = None
-    language: Optional[str] = None
\ No newline at end of file
+    language: Optional[str] = None
+
+class BookImportErrorModel(BaseModel):
+    line: int
+    error: str
+
+class BookImportResultModel(BaseModel):
+    inserted: int
+    failed: int
+    errors: List[BookImportErrorModel]
+    # A batch failed to insert; lines after it were not read
+    aborted: bool = False
@@ -0,0 +1,144 @@
+import re
+from bisect import bisect_left
+from datetime import date
+from typing import Optional
+from sqlalchemy import func, literal_column
+from sqlmodel import select, desc
+from sqlmodel.ext.asyncio.session import AsyncSession
+from config import Config
+from db.models import Book
+
+
+# Generated tsvector column added by migration; PostgreSQL only, so it is
+# not mapped on the model
+SEARCH_VECTOR = literal_column("book.search_vector")
+
+# Mirrors the setweight() labels of the generated column (A, B, C, D)
+FIELD_WEIGHTS = {"title": 1.0, "author": 0.4, "publisher": 0.2, "language": 0.1}
+
+
+def query_terms(q: Optional[str]) -> list[str]:
+    return re.findall(r"\w+", (q or "").lower())
+
+
+class InMemoryBookIndex:
+    """Prefix-matching inverted index, the search fallback for SQLite runs."""
+
+    def __init__(self, rows):
+        self.rows = {row["id"]: row for row in rows}
+        postings: dict[str, dict] = {}
+        for row in self.rows.values():
+            for field, weight in FIELD_WEIGHTS.items():
+                for term in query_terms(row[field]):
+                    scores = postings.setdefault(term, {})
+                    scores[row["id"]] = scores.get(row["id"], 0) + weight
+        self.postings = postings
+        self.terms = sorted(postings)
+
+    def _prefix_scores(self, prefix: str) -> dict:
+        scores = {}
+        start = bisect_left(self.terms, prefix)
+        for term in self.terms[start:]:
+            if not term.startswith(prefix):
+                break
+            for book_id, score in self.postings[term].items():
+                scores[book_id] = max(scores.get(book_id, 0), score)
+        return scores
+
+    def search(self, terms: list[str]) -> list[tuple]:
+        # Every term must match (AND), like the to_tsquery built for PostgreSQL
+        ranked = None
+        for term in terms:
+            scores = self._prefix_scores(term)
+            if ranked is None:
+                ranked = scores
+            else:
+                ranked = {book_id: ranked[book_id] + score for book_id, score in scores.items() if book_id in ranked}
+
+        if ranked is None:
+            ranked = {book_id: 0.0 for book_id in self.rows}
+        return sorted(
+            ((self.rows[book_id], score) for book_id, score in ranked.items()),
+            key=lambda item: (-item[1], -item[0]["created_at"].timestamp()),
+        )
+
+
+def _facet_counts(rows) -> dict:
+    facets = {"language": {}, "publisher": {}}
+    for row in rows:
+        for field, counts in facets.items():
+            counts[row[field]] = counts.get(row[field], 0) + 1
+    return {
+        field: dict(sorted(counts.items(), key=lambda item: -item[1])[:Config.SEARCH_FACET_LIMIT])
+        for field, counts in facets.items()
+    }
+
+
+class BookSearchService:
+    async def search_books(
+        self,
+        session: AsyncSession,
+        q: Optional[str] = None,
+        language: Optional[str] = None,
+        publisher: Optional[str] = None,
+        published_from: Optional[date] = None,
+        published_to: Optional[date] = None,
+        limit: int = Config.PAGE_SIZE_DEFAULT,
+    ):
+        limit = max(1, min(limit, Config.PAGE_SIZE_MAX))
+
+        filters = []
+        if language:
+            filters.append(Book.language == language)
+        if publisher:
+            filters.append(Book.publisher == publisher)
+        if published_from:
+            filters.append(Book.published_date >= published_from)
+        if published_to:
+            filters.append(Book.published_date <= published_to)
+
+        terms = query_terms(q)
+        if session.bind.dialect.name == "postgresql":
+            return await self._search_postgres(session, terms, filters, limit)
+        return await self._search_in_process(session, terms, filters, limit)
+
+    async def _search_postgres(self, session: AsyncSession, terms: list[str], filters: list, limit: int):
+        rank = literal_column("0.0")
+        if terms:
+            tsquery = func.to_tsquery("simple", " & ".join(f"{term}:*" for term in terms))
+            filters = filters + [SEARCH_VECTOR.op("@@")(tsquery)]
+            rank = func.ts_rank_cd(SEARCH_VECTOR, tsquery)
+
+        statement = (
+            select(Book.__table__, rank.label("rank"))
+            .where(*filters)
+            .order_by(desc("rank"), desc(Book.created_at), desc(Book.id))
+            .limit(limit)
+        )
+        items = (await session.execute(statement)).mappings().all()
+
+        total = (await session.execute(select(func.count()).select_from(Book).where(*filters))).scalar_one()
+
+        facets = {}
+        for field in ("language", "publisher"):
+            column = getattr(Book, field)
+            statement = (
+                select(column, func.count().label("count"))
+                .where(*filters)
+                .group_by(column)
+                .order_by(desc("count"))
+                .limit(Config.SEARCH_FACET_LIMIT)
+            )
+            facets[field] = {value: count for value, count in (await session.execute(statement)).all()}
+
+        return {"items": items, "total": total, "facets": facets}
+
+    async def _search_in_process(self, session: AsyncSession, terms: list[str], filters: list, limit: int):
+        rows = (await session.execute(select(Book.__table__).where(*filters))).mappings().all()
+        matches = InMemoryBookIndex(rows).search(terms)
+
+        return {
+            "items": [{**row, "rank": score} for row, score in matches[:limit]],
+            "total": len(matches),
+            "facets": _facet_counts(row for row, _ in matches),
+        }
@@ -1,55 +1,245 @@
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select, desc
+from sqlalchemy import and_, delete, update
+from sqlalchemy.orm import selectinload
 from fastapi import HTTPException, status
-from .schemas import BookCreateModel, BookUpdateModel
-from db.models import Book
+from .schemas import BookCreateModel, BookUpdateModel, BookDetailModel, BookModel
+from db.models import Book, Review, remove_timezone
+from db.pagination import encode_cursor, decode_cursor, after_cursor
+from db.main import ReadSessionLocal
+from .cache import book_cache
+from .ratings import average_rating_expr, rated_books_predicate
+from .conditional import build_validators
+from config import Config
+from datetime import datetime, timezone
+from typing import AsyncIterator, Optional
+import logging
 import uuid
 
+
+# Load profile for BookDetailModel responses
+BOOK_DETAIL_LOAD = (selectinload(Book.reviews),)
+
+
 class BookService:
-    async def get_all_books(self, session: AsyncSession):
+    async def _get_books_page(self, statement, limit: int, cursor: Optional[str], session: AsyncSession):
+        limit = max(1, min(limit, Config.PAGE_SIZE_MAX))
+
+        if cursor:
+            created_at, book_id = decode_cursor(cursor, datetime, uuid.UUID)
+            statement = statement.where(
+                after_cursor([Book.created_at, Book.id], (created_at, book_id))
+            )
+
+        # Fetch one extra row to know whether another page exists
+        statement = statement.order_by(desc(Book.created_at), desc(Book.id)).limit(limit + 1)
+        result = await session.exec(statement)
+        books = result.all()
+
+        next_cursor = None
+        if len(books) > limit:
+            books = books[:limit]
+            last = books[-1]
+            next_cursor = encode_cursor(last.created_at, last.id)
+
+        return {"items": books, "next_cursor": next_cursor}
+
+    async def get_all_books(self, session: AsyncSession, limit: int = Config.PAGE_SIZE_DEFAULT, cursor: Optional[str] = None):
         try:
-            statement = select(Book).order_by(desc(Book.created_at))
+            return await self._get_books_page(select(Book), limit, cursor, session)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to fetch books: {str(e)}")
+
+    async def get_page_validators(self, session: AsyncSession, limit: int = Config.PAGE_SIZE_DEFAULT, cursor: Optional[str] = None, user_id=None):
+        # Same keyset window as the page itself, but only the columns the
+        # validators are built from
+        try:
+            statement = select(Book.id, Book.created_at, Book.updated_at, Book.review_count)
+            if user_id is not None:
+                statement = statement.where(Book.user_id == user_id)
+            page = await self._get_books_page(statement, limit, cursor, session)
+            return build_validators(page["items"], page["next_cursor"])
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to fetch books: {str(e)}")
+
+    async def get_top_rated_books(self, session: AsyncSession, min_reviews: int = Config.TOP_RATED_MIN_REVIEWS, limit: int = Config.PAGE_SIZE_DEFAULT):
+        try:
+            limit = max(1, min(limit, Config.PAGE_SIZE_MAX))
+            statement = (
+                select(Book)
+                .where(rated_books_predicate(), Book.review_count >= min_reviews)
+                .order_by(desc(average_rating_expr()), desc(Book.review_count), desc(Book.id))
+                .limit(limit)
+            )
             result = await session.exec(statement)
-            books = result.all()
-            return books
+            return result.all()
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to fetch books: {str(e)}")
 
-    async def get_book(self, book_id: uuid.UUID, session: AsyncSession):
+    async def stream_books(self, fmt: str, user_id=None) -> AsyncIterator[str]:
+        # Runs while the response is being sent, after the request's own session
+        # is closed, so it opens one. Selecting the table rather than the entity
+        # keeps rows out of the identity map: memory stays at one fetch batch.
+        async with ReadSessionLocal() as session:
+            statement = select(Book.__table__)
+            if user_id is not None:
+                statement = statement.where(Book.user_id == user_id)
+            statement = (
+                statement.order_by(desc(Book.created_at), desc(Book.id))
+                .execution_options(yield_per=Config.BOOK_STREAM_BATCH_SIZE)
+            )
+
+            if fmt == "json":
+                yield "["
+            try:
+                result = await session.stream(statement)
+                first = True
+                async for row in result.mappings():
+                    item = BookModel.model_validate(dict(row)).model_dump_json()
+                    if fmt == "json":
+                        yield item if first else "," + item
+                    else:
+                        yield item + "\n"
+                    first = False
+            except Exception as e:
+                # Headers are already sent, the client sees a truncated body
+                logging.error(f"Book stream aborted: {str(e)}")
+                raise
+            if fmt == "json":
+                yield "]"
+
+    async def get_book(self, book_id: uuid.UUID, session: AsyncSession, options: tuple = BOOK_DETAIL_LOAD):
         try:
-            statement = select(Book).where(Book.id == book_id)
+            statement = select(Book).where(Book.id == book_id).options(*options)
             result = await session.exec(statement)
             book = result.first()
             if not book:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Book not found")
             return book
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to fetch book: {str(e)}")
 
+    async def get_book_validators(self, book_id: uuid.UUID, session: AsyncSession, *variant):
+        try:
+            statement = select(Book.id, Book.updated_at, Book.review_count).where(Book.id == book_id)
+            result = await session.exec(statement)
+            row = result.first()
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to fetch book: {str(e)}")
+        if not row:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Book not found")
+        return build_validators([row], *variant)
+
+    async def get_book_detail(self, book_id: uuid.UUID, session: AsyncSession, reviews_limit: Optional[int] = None):
+        # reviews_limit=None keeps the full review list for existing clients
+        if reviews_limit is None:
+            book = await self.get_book(book_id, session)
+            return BookDetailModel.model_validate(book, from_attributes=True)
+
+        book = await self.get_book(book_id, session, options=())
+        try:
+            statement = (
+                select(Review)
+                .where(Review.book_id == book_id)
+                .order_by(desc(Review.created_at), desc(Review.id))
+                .limit(reviews_limit)
+            )
+            result = await session.exec(statement)
+            return BookDetailModel.model_validate(
+                {**book.model_dump(), "reviews": result.all()}, from_attributes=True
+            )
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to fetch book: {str(e)}")
+
+    async def get_books_by_ids(self, book_ids: list[uuid.UUID], session: AsyncSession):
+        try:
+            book_ids = list(dict.fromkeys(book_ids))
+
+            # Two statements for the whole batch: the books, then all of
+            # their reviews grouped in Python
+            result = await session.exec(select(Book).where(Book.id.in_(book_ids)))
+            books = {book.id: book for book in result.all()}
+
+            reviews_by_book = {book_id: [] for book_id in books}
+            if books:
+                statement = (
+                    select(Review)
+                    .where(Review.book_id.in_(list(books)))
+                    .order_by(desc(Review.created_at), desc(Review.id))
+                )
+                result = await session.exec(statement)
+                for review in result.all():
+                    reviews_by_book[review.book_id].append(review)
+
+            found = [
+                BookDetailModel.model_validate(
+                    {**books[book_id].model_dump(), "reviews": reviews_by_book[book_id]},
+                    from_attributes=True,
+                )
+                for book_id in book_ids if book_id in books
+            ]
+            missing = [book_id for book_id in book_ids if book_id not in books]
+            return {"books": found, "missing": missing}
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to fetch books: {str(e)}")
+
     async def create_book(self, book_data: BookCreateModel,user_id, session: AsyncSession):
         try:
             book_data_dict = book_data.model_dump()
             new_book = Book(**book_data_dict)
-            new_book.user_id= user_id
+            new_book.user_id= uuid.UUID(str(user_id))
             session.add(new_book)
             await session.commit()
             await session.refresh(new_book)
+            await book_cache.invalidate()
             return new_book
         except Exception as e:
             await session.rollback()  # Rollback in case of failure
             raise HTTPException(status_code=500, detail=f"Failed to create book: {str(e)}")
 
-    async def update_book(self, book_id: uuid.UUID, update_data: BookUpdateModel, session: AsyncSession):
+    def _owned_by(self, book_id: uuid.UUID, principal):
+        # Admins may change any book, everyone else only their own
+        condition = Book.id == book_id
+        if principal.role != "admin":
+            condition = and_(condition, Book.user_id == uuid.UUID(str(principal.id)))
+        return condition
+
+    async def _raise_missing_or_forbidden(self, book_id: uuid.UUID, session: AsyncSession):
+        # Only reached when the guarded statement matched nothing
+        result = await session.exec(select(Book.id).where(Book.id == book_id))
+        if result.first() is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Book not found")
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You can only modify your own books")
+
+    async def update_book(self, book_id: uuid.UUID, update_data: BookUpdateModel, principal, session: AsyncSession):
         try:
-            book_to_update = await self.get_book(book_id, session)  
-            update_data_dict = update_data.model_dump(exclude_unset=True)  
+            values = update_data.model_dump(exclude_unset=True)
+            if values.get("published_date") is not None:
+                values["published_date"] = values["published_date"].date()
 
-            for key, value in update_data_dict.items():
-                setattr(book_to_update, key, value)
+            # One statement: ownership check, update and the row for the response
+            result = await session.execute(
+                update(Book)
+                .where(self._owned_by(book_id, principal))
+                .values(**values, updated_at=remove_timezone(datetime.now(timezone.utc)))
+                .returning(*Book.__table__.columns)
+            )
+            row = result.mappings().first()
+            if row is None:
+                await session.rollback()
+                await self._raise_missing_or_forbidden(book_id, session)
 
             await session.commit()
-            await session.refresh(book_to_update)
-            return book_to_update
+            await book_cache.invalidate(book_id)
+            return dict(row)
 
         except HTTPException:
             raise  
@@ -57,11 +247,18 @@ class BookService:
             await session.rollback()
             raise HTTPException(status_code=500, detail=f"Failed to update book: {str(e)}")
 
-    async def delete_book(self, book_id: uuid.UUID, session: AsyncSession):
+    async def delete_book(self, book_id: uuid.UUID, principal, session: AsyncSession):
+        # Reviews go with the book through ON DELETE CASCADE, nothing is loaded
         try:
-            book_to_delete = await self.get_book(book_id, session)  
-            await session.delete(book_to_delete)
+            result = await session.execute(
+                delete(Book).where(self._owned_by(book_id, principal)).returning(Book.id)
+            )
+            if result.first() is None:
+                await session.rollback()
+                await self._raise_missing_or_forbidden(book_id, session)
+
             await session.commit()
+            await book_cache.invalidate(book_id)
             return {"message": "Book deleted successfully"}
 
         except HTTPException:
@@ -71,12 +268,12 @@ class BookService:
             raise HTTPException(status_code=500, detail=f"Failed to delete book: {str(e)}")
         
 
-    async def get_user_books(self, user_id, session:AsyncSession):
+    async def get_user_books(self, user_id, session:AsyncSession, limit: int = Config.PAGE_SIZE_DEFAULT, cursor: Optional[str] = None):
         try:
-            statement = select(Book).where(Book.user_id == user_id).order_by(desc(Book.created_at))
-            result = await session.exec(statement)
-            books = result.all()
-            return books
+            statement = select(Book).where(Book.user_id == user_id)
+            return await self._get_books_page(statement, limit, cursor, session)
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to fetch books: {str(e)}")
 
@@ -1,6 +1,13 @@
-from celery import Celery
-from mail import CreateMessage, mail
-from asgiref.sync import async_to_sync
+import json
+import logging
+import smtplib
+import redis
+from celery import Celery, Task
+from celery.signals import worker_process_shutdown
+from config import Config
+from mail import CreateMessage, mailer
+from db.redis import token_blocklist
+from metrics import registry
 
 
 
@@ -8,10 +15,68 @@ c_app= Celery()
 
 c_app.config_from_object('config')
 
+# The worker is synchronous, so it gets its own blocking client
+dead_letters = redis.Redis.from_url(Config.REDIS_URL)
 
-@c_app.task()
+
+async def celery_queue_depth():
+    # With the Redis broker each queue is a list named after the queue
+    return {(queue.name,): await token_blocklist.llen(queue.name) for queue in c_app.conf.task_queues}
+
+registry.gauge("celery_queue_depth", "Messages waiting in the Celery queue", celery_queue_depth, ("queue",))
+
+
+class MailTask(Task):
+    # Only reached once autoretry has given up
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        # The body is left out: it can hold live verification and reset links
+        call = dict(zip(("recipients", "subject", "body"), args), **kwargs)
+        call.pop("body", None)
+        try:
+            pipe = dead_letters.pipeline(transaction=False)
+            pipe.rpush(Config.MAIL_DEAD_LETTER_KEY, json.dumps({
+                "task_id": task_id,
+                **call,
+                "error": repr(exc),
+                "retries": self.request.retries,
+            }))
+            pipe.ltrim(Config.MAIL_DEAD_LETTER_KEY, -Config.MAIL_DEAD_LETTER_MAX, -1)
+            pipe.expire(Config.MAIL_DEAD_LETTER_KEY, Config.MAIL_DEAD_LETTER_TTL)
+            pipe.execute()
+        except redis.RedisError as e:
+            logging.error(f"Mail dead letter write failed for {task_id}: {str(e)}")
+
+
+@c_app.task(
+    base=MailTask,
+    autoretry_for=(smtplib.SMTPException, OSError),
+    retry_backoff=True,
+    retry_backoff_max=Config.MAIL_RETRY_BACKOFF_MAX,
+    retry_jitter=True,
+    max_retries=Config.MAIL_MAX_RETRIES,
+    rate_limit=Config.MAIL_RATE_LIMIT,
+    ignore_result=True,
+)
 def send_email(recipients : list[str], subject:str, body :str ):
     message = CreateMessage(
         recipient=recipients, subject=subject, body=body
     )
-    async_to_sync(mail.send_message)(message)
+    mailer.send(message, recipients)
+
+
+@worker_process_shutdown.connect
+def close_mailer(**kwargs):
+    mailer.close()
+
+
+def enqueue_mail(recipients: list[str], subject: str, body: str):
+    # The only way request handlers send mail: one task per batch of
+    # recipients, delivered over the worker's open SMTP session. Publishing
+    # blocks, so handlers run this as a background task, after the response
+    # and off the event loop; a broker outage loses the mail, not the request
+    for start in range(0, len(recipients), Config.MAIL_BATCH_SIZE):
+        batch = recipients[start:start + Config.MAIL_BATCH_SIZE]
+        try:
+            send_email.delay(batch, subject=subject, body=body)
+        except Exception as e:
+            logging.error(f"Mail enqueue failed for {len(batch)} recipients ({subject!r}): {str(e)}")
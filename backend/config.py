@@ -2,12 +2,21 @@
 from pydantic import SecretStr
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from dotenv import load_dotenv
+from kombu import Queue
 import os
 
 load_dotenv()
 
 class Settings(BaseSettings):
     DATABASE_URL: str = os.getenv("DATABASE_URL", "")
+    DATABASE_READ_URL: str = os.getenv("DATABASE_READ_URL", "")
+    DB_POOL_SIZE:int = 10
+    DB_MAX_OVERFLOW:int = 20
+    DB_POOL_TIMEOUT:float = 30
+    DB_POOL_RECYCLE:int = 1800
+    DB_POOL_PRE_PING:bool = True
+    DB_STATEMENT_TIMEOUT_MS:int = 30000
+    DB_STATEMENT_CACHE_SIZE:int = 100
     JWT_SECRET: str = os.getenv("JWT_SECRET", "")
     JWT_ALGORITHM : str= os.getenv("JWT_ALGORITHM", "")
     REDIS_URL:str = "redis://redis_db:6379/0"
@@ -21,6 +30,37 @@ class Settings(BaseSettings):
     USE_CREDENTIALS:bool =True
     VALIDATE_CERTS :bool= True
     DOMAIN:str= os.getenv("DOMAIN", "")
+    STATELESS_AUTH:bool = False
+    TOKEN_CACHE_SIZE:int = 1024
+    TOKEN_BLOCKLIST_LOCAL_CACHE:bool = True
+    TOKEN_BLOCKLIST_PING_INTERVAL:float = 15
+    BCRYPT_ROUNDS:int = 12
+    PASSWORD_HASH_WORKERS:int = 4
+    LOG_FILE:str = "app.log"
+    ACCESS_LOG_SAMPLE_RATE:float = 1.0
+    PAGE_SIZE_DEFAULT:int = 20
+    PAGE_SIZE_MAX:int = 100
+    BOOK_CACHE_ENABLED:bool = True
+    BOOK_CACHE_TTL:int = 300
+    BOOK_IMPORT_BATCH_SIZE:int = 1000
+    BOOK_BATCH_MAX_IDS:int = 100
+    BOOK_STREAM_BATCH_SIZE:int = 500
+    SEARCH_FACET_LIMIT:int = 20
+    TOP_RATED_MIN_REVIEWS:int = 5
+    BOOK_IMPORT_MAX_ERRORS:int = 100
+    DEBUG:bool = False
+    SLOW_QUERY_MS:float = 200
+    BOOK_DETAIL_CACHE_CONTROL:str = "private, no-cache"
+    BOOK_LIST_CACHE_CONTROL:str = "private, max-age=30"
+    MAIL_BATCH_SIZE:int = 50
+    MAIL_MAX_RETRIES:int = 5
+    MAIL_RETRY_BACKOFF_MAX:int = 600
+    MAIL_SMTP_TIMEOUT:float = 30
+    MAIL_DEAD_LETTER_KEY:str = "mail:dead_letter"
+    MAIL_DEAD_LETTER_MAX:int = 1000
+    MAIL_DEAD_LETTER_TTL:int = 7 * 24 * 3600
+    MAIL_RATE_LIMIT:str = "60/m"
+    CELERY_PREFETCH_MULTIPLIER:int = 1
 
 
     model_config = SettingsConfigDict(
@@ -32,4 +72,16 @@ Config = Settings()
 
 
 broker_url= Config.REDIS_URL
-result_backend= Config.REDIS_URL
\ No newline at end of file
+result_backend= Config.REDIS_URL
+
+# One queue per task family so a mail backlog cannot starve other work;
+# workers pick queues with -Q
+task_default_queue = "default"
+task_queues = (Queue("default"), Queue("mail"))
+task_routes = {"celery_tasks.send_email": {"queue": "mail"}}
+
+# Ack after the task finishes so a killed worker's message is redelivered,
+# and reserve one message at a time since mail tasks are slow and uneven
+task_acks_late = True
+task_reject_on_worker_lost = True
+worker_prefetch_multiplier = Config.CELERY_PREFETCH_MULTIPLIER
\ No newline at end of file
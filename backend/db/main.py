@@ -1,27 +1,108 @@
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import SQLModel
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from config import Config
 from db.models import Book
+from metrics import registry
 
-#  Create the async engine
-async_engine = create_async_engine(
-    Config.DATABASE_URL,
-)
+
+def build_engine(database_url: str):
+    engine_kwargs = {
+        "pool_pre_ping": Config.DB_POOL_PRE_PING,
+        "pool_recycle": Config.DB_POOL_RECYCLE,
+    }
+
+    # SQLite uses a pool without size limits
+    if not database_url.startswith("sqlite"):
+        engine_kwargs.update(
+            pool_size=Config.DB_POOL_SIZE,
+            max_overflow=Config.DB_MAX_OVERFLOW,
+            pool_timeout=Config.DB_POOL_TIMEOUT,
+        )
+
+    if "+asyncpg" in database_url:
+        # The dialect prepares statements through its own cache, sized by
+        # this URL parameter; asyncpg's statement_cache_size only covers
+        # its implicit cache, which the dialect bypasses
+        url = make_url(database_url)
+        if "prepared_statement_cache_size" not in url.query:
+            url = url.update_query_dict({"prepared_statement_cache_size": str(Config.DB_STATEMENT_CACHE_SIZE)})
+        database_url = url
+
+        connect_args = {}
+        if Config.DB_STATEMENT_CACHE_SIZE == 0:
+            # pgbouncer in transaction mode: no prepared statements anywhere
+            connect_args["statement_cache_size"] = 0
+        if Config.DB_STATEMENT_TIMEOUT_MS:
+            connect_args["server_settings"] = {"statement_timeout": str(Config.DB_STATEMENT_TIMEOUT_MS)}
+        engine_kwargs["connect_args"] = connect_args
+
+    return create_async_engine(database_url, **engine_kwargs)
+
+
+#  Create the async engines, reads go to the replica when one is configured
+async_engine = build_engine(Config.DATABASE_URL)
+read_engine = build_engine(Config.DATABASE_READ_URL) if Config.DATABASE_READ_URL else async_engine
+
+
+def pool_status(engine) -> dict:
+    pool = engine.pool
+    # NullPool/StaticPool (e.g. SQLite) have no counters to report
+    if not hasattr(pool, "checkedout"):
+        return {}
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+    }
+
+
+def _engines() -> dict:
+    engines = {"primary": async_engine}
+    if read_engine is not async_engine:
+        engines["replica"] = read_engine
+    return engines
+
+
+def _pool_gauge(field: str):
+    return lambda: {
+        (name,): stats[field]
+        for name, stats in ((name, pool_status(engine)) for name, engine in _engines().items())
+        if field in stats
+    }
+
+
+registry.gauge("db_pool_size", "Configured pool size", _pool_gauge("size"), ("engine",))
+registry.gauge("db_pool_checked_in", "Idle connections in the pool", _pool_gauge("checked_in"), ("engine",))
+registry.gauge("db_pool_checked_out", "Connections checked out of the pool", _pool_gauge("checked_out"), ("engine",))
+registry.gauge("db_pool_overflow", "Connections opened beyond pool_size", _pool_gauge("overflow"), ("engine",))
 
 #  Initialize database and create tables
 async def init_db():
     async with async_engine.begin() as conn:
         await conn.run_sync(SQLModel.metadata.create_all)
 
-#  Create the async session maker 
+#  Create the async session makers
 AsyncSessionLocal = async_sessionmaker(
     bind=async_engine,
     class_=AsyncSession,  
     expire_on_commit=False
 )
 
+ReadSessionLocal = async_sessionmaker(
+    bind=read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False
+)
+
 #  Correct session dependency function
 async def get_session():
     async with AsyncSessionLocal() as session:
         yield session  #  Ensures session is closed properly after use
+
+#  Session for read-only GET routes, may lag the primary slightly
+async def get_read_session():
+    async with ReadSessionLocal() as session:
+        yield session
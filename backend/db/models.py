@@ -3,7 +3,7 @@ from sqlmodel import SQLModel, Field, Relationship
 from pydantic import EmailStr
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 import sqlalchemy.dialects.postgresql as pg
-from sqlalchemy import Column
+from sqlalchemy import Column, Index
 from typing import Optional, List
 import uuid
 
@@ -14,6 +14,12 @@ def remove_timezone(dt: datetime) -> datetime:
 
 
 class User(SQLModel, table=True):
+    # Every login and token check looks a user up by one of these
+    __table_args__ = (
+        Index("ix_user_email", "email", unique=True),
+        Index("ix_user_username", "username", unique=True),
+    )
+
     id: uuid.UUID = Field(
         sa_column=Column(PG_UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     )
@@ -23,18 +29,26 @@ class User(SQLModel, table=True):
     last_name: Optional[str] = Field(default=None, nullable=True)
     role: str = Field(sa_column=Column(pg.VARCHAR, nullable=False, server_default="user"))
     is_verified: Optional[bool] = Field(default=False)
+    token_version: int = Field(default=0, sa_column=Column(pg.INTEGER, nullable=False, server_default="0"))
     password_hash: str = Field(exclude=True)
     created_at : datetime = Field(default_factory=lambda: remove_timezone(datetime.now(timezone.utc)))
     updated_at: datetime = Field(default_factory=lambda: remove_timezone(datetime.now(timezone.utc)))
 
-    books: List["Book"] = Relationship(back_populates="user", sa_relationship_kwargs={'lazy': 'selectin', 'cascade': 'all, delete-orphan'} )
-    reviews: List["Review"] = Relationship(back_populates="user", sa_relationship_kwargs={'lazy': 'selectin', 'cascade': 'all, delete-orphan'})
+    # Relationships never load implicitly (lazy="raise"); each service query
+    # opts in with selectinload() for what its response schema needs
+    books: List["Book"] = Relationship(back_populates="user", sa_relationship_kwargs={'lazy': 'raise', 'cascade': 'all, delete-orphan'} )
+    reviews: List["Review"] = Relationship(back_populates="user", sa_relationship_kwargs={'lazy': 'raise', 'cascade': 'all, delete-orphan'})
 
     def __repr__(self) -> str:
         return f"<User {self.username}>"
 
 
 class Book(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_book_created_at_id", "created_at", "id"),
+        Index("ix_book_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
+
     id: uuid.UUID = Field(
         sa_column=Column(PG_UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     )
@@ -45,27 +59,42 @@ class Book(SQLModel, table=True):
     page_count: int
     language: str
     user_id: Optional[uuid.UUID] = Field(default=None, foreign_key="user.id")
+    # Denormalized from review, maintained by ReviewService.add_review_to_book
+    review_count: int = Field(default=0, sa_column=Column(pg.INTEGER, nullable=False, server_default="0"))
+    rating_sum: int = Field(default=0, sa_column=Column(pg.INTEGER, nullable=False, server_default="0"))
+    rating_1: int = Field(default=0, sa_column=Column(pg.INTEGER, nullable=False, server_default="0"))
+    rating_2: int = Field(default=0, sa_column=Column(pg.INTEGER, nullable=False, server_default="0"))
+    rating_3: int = Field(default=0, sa_column=Column(pg.INTEGER, nullable=False, server_default="0"))
+    rating_4: int = Field(default=0, sa_column=Column(pg.INTEGER, nullable=False, server_default="0"))
+    rating_5: int = Field(default=0, sa_column=Column(pg.INTEGER, nullable=False, server_default="0"))
     created_at : datetime = Field(default_factory=lambda: remove_timezone(datetime.now(timezone.utc)))
     updated_at: datetime = Field(default_factory=lambda: remove_timezone(datetime.now(timezone.utc)))
-    user: Optional["User"] = Relationship(back_populates="books", sa_relationship_kwargs={"lazy": "joined"})
-    reviews: List["Review"] = Relationship(back_populates="book", sa_relationship_kwargs={'lazy': 'selectin', 'cascade': 'all, delete-orphan'})
+    user: Optional["User"] = Relationship(back_populates="books", sa_relationship_kwargs={"lazy": "raise"})
+    # passive_deletes: the database cascade removes reviews, the ORM never loads them to delete
+    reviews: List["Review"] = Relationship(back_populates="book", sa_relationship_kwargs={'lazy': 'raise', 'cascade': 'all, delete-orphan', 'passive_deletes': True})
 
     def __repr__(self):
         return f"<Book {self.title}>"
 
 
 class Review(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_review_book_id_created_at_id", "book_id", "created_at", "id"),
+        Index("ix_review_book_id_rating_created_at_id", "book_id", "rating", "created_at", "id"),
+        Index("ix_review_user_id", "user_id"),
+    )
+
     id: uuid.UUID = Field(
         sa_column=Column(PG_UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     )
     rating: int = Field(ge=1, le=5)  # Ensures a 1-5 range
     review_text: str
     user_id: Optional[uuid.UUID] = Field(default=None, foreign_key="user.id")
-    book_id: Optional[uuid.UUID] = Field(default=None, foreign_key="book.id")
+    book_id: Optional[uuid.UUID] = Field(default=None, foreign_key="book.id", ondelete="CASCADE")
     created_at : datetime = Field(default_factory=lambda: remove_timezone(datetime.now(timezone.utc)))
     updated_at: datetime = Field(default_factory=lambda: remove_timezone(datetime.now(timezone.utc)))
-    user: Optional["User"] = Relationship(back_populates="reviews", sa_relationship_kwargs={"lazy": "joined"})
-    book: Optional["Book"] = Relationship(back_populates="reviews", sa_relationship_kwargs={"lazy": "joined"})
+    user: Optional["User"] = Relationship(back_populates="reviews", sa_relationship_kwargs={"lazy": "raise"})
+    book: Optional["Book"] = Relationship(back_populates="reviews", sa_relationship_kwargs={"lazy": "raise"})
 
     def __repr__(self):
         return f"<Review {self.review_text}>"
@@ -0,0 +1,49 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_
+
+
+def encode_cursor(*values) -> str:
+    # Opaque cursor: the sort key of the last row on the page
+    parts = []
+    for value in values:
+        if isinstance(value, datetime):
+            parts.append(value.isoformat())
+        elif isinstance(value, uuid.UUID):
+            parts.append(str(value))
+        else:
+            parts.append(value)
+
+    raw = json.dumps(parts, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types) -> tuple:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        parts = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if len(parts) != len(types):
+            raise ValueError("cursor shape mismatch")
+
+        values = []
+        for part, type_ in zip(parts, types):
+            if type_ is datetime:
+                values.append(datetime.fromisoformat(part))
+            elif type_ is uuid.UUID:
+                values.append(uuid.UUID(part))
+            else:
+                values.append(type_(part))
+        return tuple(values)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor"
+        )
+
+
+def after_cursor(columns: list, values: tuple):
+    # Row-value comparison so the (col_a, col_b, ...) index is range-scanned,
+    # every page costs the same regardless of how deep it is
+    return tuple_(*columns) < tuple_(*values)
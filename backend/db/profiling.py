@@ -0,0 +1,140 @@
+import logging
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from config import Config
+from db.main import async_engine, read_engine
+from metrics import registry
+
+
+slow_query_logger = logging.getLogger("bookly.sql.slow")
+
+QUERIES_PER_REQUEST = registry.histogram(
+    "db_queries_per_request", "SQL statements executed while serving a request", ("method", "route"),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+QUERY_SECONDS = registry.counter(
+    "db_query_seconds_total", "Time spent in SQL statements, by route", ("method", "route")
+)
+
+# Placeholder lists from expanding IN and executemany, e.g. ($1, $2, $3)
+_PARAM_LIST = re.compile(r"\(\s*(?:\$\d+|\?|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\$\d+|\?|%\(\w+\)s|:\w+))*\s*\)")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w$])\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(statement: str) -> str:
+    # Same query shape, same text: literals and IN lists collapse to one token
+    statement = _STRING_LITERAL.sub("?", statement)
+    statement = _NUMBER_LITERAL.sub("?", statement)
+    statement = _PARAM_LIST.sub("(...)", statement)
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+class QueryStats:
+    __slots__ = ("count", "duration")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+
+# Set per request by QueryProfilingMiddleware; statements outside a request
+# (CLIs, background jobs) are only checked against the slow query threshold
+current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+# Set by capture_statements(), for tests that look at the SQL the services send
+captured_statements: ContextVar[Optional[list]] = ContextVar("captured_statements", default=None)
+
+
+@contextmanager
+def capture_statements():
+    # Collects (statement, parameters) as the driver received them
+    statements = []
+    token = captured_statements.set(statements)
+    try:
+        yield statements
+    finally:
+        captured_statements.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+
+    stats = current_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.duration += elapsed
+
+    captured = captured_statements.get()
+    if captured is not None and not executemany:
+        captured.append((statement, parameters))
+
+    if elapsed * 1000 >= Config.SLOW_QUERY_MS:
+        slow_query_logger.warning(f"Slow query ({elapsed * 1000:.1f} ms): {normalize_sql(statement)}")
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    starts = exception_context.connection.info.get("query_start_time") if exception_context.connection else None
+    if starts:
+        starts.pop()
+
+
+def instrument(engine):
+    # Cursor events fire on the sync engine the async one wraps; the greenlet
+    # it runs in shares the request task's contextvars
+    sync_engine = engine.sync_engine
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(sync_engine, "handle_error", _handle_error)
+
+
+class QueryProfilingMiddleware:
+    """Counts statements and DB time per request.
+
+    Feeds the per-route query metrics and, with DEBUG on, reports the totals
+    in a Server-Timing header.
+    """
+
+    def __init__(self, app, server_timing: bool = False):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = current_stats.set(stats)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and self.server_timing:
+                # Statements issued while a streaming body is sent come later
+                # and only show up in the metrics
+                header = f'db;dur={stats.duration * 1000:.3f};desc="{stats.count} queries"'
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", header.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_stats.reset(token)
+            route = scope.get("route")
+            route_path = getattr(route, "path_format", None) or "unmatched"
+            QUERIES_PER_REQUEST.observe(stats.count, scope["method"], route_path)
+            QUERY_SECONDS.inc(scope["method"], route_path, amount=stats.duration)
+
+
+for _engine in {async_engine, read_engine}:
+    instrument(_engine)
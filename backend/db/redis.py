@@ -1,16 +1,177 @@
+import asyncio
+import logging
+import time
 import redis.asyncio as redis
 from config import Config
+from metrics import registry
+
+redis_client = redis.from_url(Config.REDIS_URL)
+token_blocklist = redis_client
+
+REDIS_LATENCY = registry.histogram(
+    "redis_command_duration_seconds", "Redis round trips made by db/redis.py", ("command",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+)
+
+BLOCKLIST_CHANNEL = "token_blocklist"
+JTI_EXPIRY = 3600  # Expiration time in seconds
+
+# Revocations used to be stored under the bare jti (a UUID). Those keys are
+# still honoured until they expire; drop this an hour after the rename ships
+LEGACY_JTI_PATTERN = "????????-????-????-????-????????????"
+
+
+class LocalBlocklist:
+    """Per-process view of revoked JTIs and token versions.
+
+    Kept fresh through a pub/sub channel, so the authenticated hot path is a
+    dict lookup. Until the subscription is live (or after it drops) callers
+    fall back to a direct Redis GET.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.revoked: dict[str, float] = {}
+        self.versions: dict[str, int] = {}
+        self.ready = False
+        self._task = None
+        self._next_prune = 0.0
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.ready = False
+
+    async def _listen(self):
+        while True:
+            pubsub = self.client.pubsub()
+            try:
+                # Subscribe before warming up so nothing published in between is lost
+                await pubsub.subscribe(BLOCKLIST_CHANNEL)
+                await self._warm_up()
+                self.ready = True
+                await self._consume(pubsub)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.warning(f"Blocklist subscription lost, using direct lookups: {str(e)}")
+            finally:
+                self.ready = False
+                await pubsub.aclose()
+
+            await asyncio.sleep(1)
+
+    async def _consume(self, pubsub):
+        # listen() would wait forever on a half-open connection with ready
+        # still True. A quiet channel gets a PING instead, and no reply by the
+        # next interval counts as a lost subscription.
+        interval = Config.TOKEN_BLOCKLIST_PING_INTERVAL
+        awaiting_pong = False
+        while True:
+            message = await pubsub.get_message(timeout=interval)
+            if message is None:
+                if awaiting_pong:
+                    raise ConnectionError(f"no reply to PING within {interval}s")
+                await pubsub.ping()
+                awaiting_pong = True
+                continue
+
+            awaiting_pong = False
+            if message["type"] == "message":
+                self._apply(message["data"])
+
+    async def _warm_up(self):
+        revoked = {}
+        expires_at = time.monotonic() + JTI_EXPIRY
+        async for key in self.client.scan_iter(match="blocklist:*", count=1000):
+            revoked[key.decode().split(":", 1)[1]] = expires_at
+        async for key in self.client.scan_iter(match=LEGACY_JTI_PATTERN, count=1000):
+            revoked[key.decode()] = expires_at
+
+        versions = {}
+        async for key in self.client.scan_iter(match="token_version:*", count=1000):
+            value = await self.client.get(key)
+            if value is not None:
+                versions[key.decode().split(":", 1)[1]] = int(value)
+
+        self.revoked.update(revoked)
+        self.versions.update(versions)
+
+    def _apply(self, data: bytes):
+        kind, _, payload = data.decode().partition(":")
+        if kind == "revoke":
+            self.revoked[payload] = time.monotonic() + JTI_EXPIRY
+        elif kind == "version":
+            user_uid, _, version = payload.rpartition(":")
+            self.versions[user_uid] = max(int(version), self.versions.get(user_uid, 0))
+
+    def is_revoked(self, jti: str) -> bool:
+        now = time.monotonic()
+        if now >= self._next_prune:
+            self.revoked = {k: v for k, v in self.revoked.items() if v > now}
+            self._next_prune = now + 60
+
+        expires_at = self.revoked.get(jti)
+        return expires_at is not None and expires_at > now
+
+
+blocklist_cache = LocalBlocklist(token_blocklist)
+
+
+def _use_local_cache() -> bool:
+    return Config.TOKEN_BLOCKLIST_LOCAL_CACHE and blocklist_cache.ready
+
 
-token_blocklist = redis.from_url(Config.REDIS_URL)
 async def add_jti_to_blocklist(jti: str):
-    await token_blocklist.set(
-        name=jti,
-        value="",
-        ex=3600  # Expiration time in seconds
-    )
+    with REDIS_LATENCY.time("set"):
+        await token_blocklist.set(
+            name=f"blocklist:{jti}",
+            value="",
+            ex=JTI_EXPIRY
+        )
+    blocklist_cache.revoked[jti] = time.monotonic() + JTI_EXPIRY
+    with REDIS_LATENCY.time("publish"):
+        await token_blocklist.publish(BLOCKLIST_CHANNEL, f"revoke:{jti}")
 
 async def token_in_blocklist(jti: str):
-    jti_value = await token_blocklist.get(jti)
-    return jti_value is not None  # Returns True if token exists in blocklist
+    if _use_local_cache():
+        return blocklist_cache.is_revoked(jti)
+
+    with REDIS_LATENCY.time("mget"):
+        values = await token_blocklist.mget(f"blocklist:{jti}", jti)
+    return any(value is not None for value in values)  # Returns True if token exists in blocklist
+
+async def get_token_version(user_uid: str):
+    if _use_local_cache():
+        return blocklist_cache.versions.get(user_uid)
+
+    with REDIS_LATENCY.time("get"):
+        version = await token_blocklist.get(f"token_version:{user_uid}")
+    return int(version) if version is not None else None
 
+async def set_token_version(user_uid: str, version: int):
+    # No expiry: tokens issued before this version must stay rejected
+    with REDIS_LATENCY.time("set"):
+        await token_blocklist.set(name=f"token_version:{user_uid}", value=version)
+    blocklist_cache.versions[user_uid] = version
+    with REDIS_LATENCY.time("publish"):
+        await token_blocklist.publish(BLOCKLIST_CHANNEL, f"version:{user_uid}:{version}")
 
+async def seed_token_version(user_uid: str, version: int):
+    # Puts back a missing key from the database copy. NX, so a bump that
+    # landed in the meantime isn't overwritten with the older version.
+    with REDIS_LATENCY.time("set"):
+        seeded = await token_blocklist.set(name=f"token_version:{user_uid}", value=version, nx=True)
+    blocklist_cache.versions[user_uid] = max(version, blocklist_cache.versions.get(user_uid, 0))
+    if seeded:
+        with REDIS_LATENCY.time("publish"):
+            await token_blocklist.publish(BLOCKLIST_CHANNEL, f"version:{user_uid}:{version}")
@@ -1,42 +1,75 @@
-from fastapi_mail import FastMail, ConnectionConfig, MessageSchema, MessageType
-
-
+import smtplib
+import ssl
+from email.message import EmailMessage
 from config import Config
-from pathlib import Path
 
 
+class SMTPMailer:
+    """Keeps one SMTP session open across sends.
+
+    Lives in the Celery worker process; a dropped session is reopened once
+    per send before the error is handed back to the task's retry logic.
+    """
 
-BASE_DIR= Path(__file__).resolve().parent
+    def __init__(self, config=Config):
+        self.config = config
+        self._smtp = None
 
+    def _connect(self):
+        context = ssl.create_default_context()
+        if not self.config.VALIDATE_CERTS:
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
 
-conf = ConnectionConfig(
+        if self.config.MAIL_SSL_TLS:
+            smtp = smtplib.SMTP_SSL(
+                self.config.MAIL_SERVER, self.config.MAIL_PORT,
+                timeout=self.config.MAIL_SMTP_TIMEOUT, context=context,
+            )
+        else:
+            smtp = smtplib.SMTP(
+                self.config.MAIL_SERVER, self.config.MAIL_PORT, timeout=self.config.MAIL_SMTP_TIMEOUT
+            )
+            if self.config.MAIL_STARTTLS:
+                smtp.starttls(context=context)
 
-    MAIL_USERNAME =Config.MAIL_USERNAME,
-    MAIL_PASSWORD = Config.MAIL_PASSWORD,
-    MAIL_FROM = Config.MAIL_FROM,
-    MAIL_PORT = Config.MAIL_PORT,
-    MAIL_SERVER = Config.MAIL_SERVER,
-    MAIL_STARTTLS = Config.MAIL_STARTTLS,
-    MAIL_SSL_TLS = Config.MAIL_SSL_TLS,
-    USE_CREDENTIALS = Config.USE_CREDENTIALS,
-    VALIDATE_CERTS = Config.VALIDATE_CERTS,
-    TEMPLATE_FOLDER= Path(BASE_DIR, 'templates')
-)
+        if self.config.USE_CREDENTIALS:
+            smtp.login(self.config.MAIL_USERNAME, self.config.MAIL_PASSWORD.get_secret_value())
+        return smtp
 
+    def send(self, message: EmailMessage, recipients: list[str]):
+        # Explicit envelope recipients: the To header is a placeholder and
+        # must never receive a copy
+        if self._smtp is None:
+            self._smtp = self._connect()
+        try:
+            self._smtp.send_message(message, to_addrs=recipients)
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            # Servers drop idle sessions, reconnect once
+            self.close()
+            self._smtp = self._connect()
+            self._smtp.send_message(message, to_addrs=recipients)
 
-mail = FastMail(
-    config= conf
-)
+    def close(self):
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+        self._smtp = None
 
 
-def CreateMessage(recipient:list[str], subject:str, body:str):
-    message = MessageSchema(
-        recipients=recipient,
-        subject=subject,
-        body=body,
-        subtype= MessageType.html
-    )
+def CreateMessage(recipient:list[str], subject:str, body:str) -> EmailMessage:
+    # Recipients go in Bcc so a batch does not disclose addresses to each other
+    message = EmailMessage()
+    message["From"] = Config.MAIL_FROM
+    message["To"] = "undisclosed-recipients:;"
+    message["Bcc"] = ", ".join(recipient)
+    message["Subject"] = subject
+    message.set_content(body, subtype="html")
 
     return message
 
 
+mailer = SMTPMailer()
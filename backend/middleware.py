@@ -1,46 +1,105 @@
-import time
+import json
 import logging
-from urllib import response
-from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
-from starlette.responses import Response
+import queue
+import random
+import time
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener
+from fastapi import FastAPI
+from config import Config
+from metrics import MetricsMiddleware
+from db.profiling import QueryProfilingMiddleware
 
 
-logging.basicConfig(
-    filename="app.log", 
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-)
+REDACTED_HEADERS = {"authorization", "cookie", "set-cookie", "x-api-key"}
+
+access_logger = logging.getLogger("bookly.access")
+access_logger.propagate = False
 
 logger = logging.getLogger("uvicorn.access")
-logger.disabled = True  
+logger.disabled = True
 
-def register_middleware(app: FastAPI):
-    @app.middleware("http")
-    async def logging_middleware(request: Request, call_next):
-        start_time = time.time()
 
-        request_info = (
-            f"Incoming Request: {request.method} {request.url.path} | "
-            f"Headers: {dict(request.headers)}"
-        )
-        print(request_info)
-        logging.info(request_info)
+class JSONFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = getattr(record, "access", None)
+        if entry is None:
+            entry = {"level": record.levelname, "logger": record.name, "message": record.getMessage()}
+        entry["time"] = self.formatTime(record)
+        return json.dumps(entry, default=str)
 
-        response: Response = await call_next(request)
-        process_time = time.time() - start_time
 
-        response_info = (
-            f"Response: {response.status_code} | "
-            f"Processed in {process_time:.6f} sec"
-        )
-        print(response_info)
-        logging.info(response_info)
+@contextmanager
+def file_logging():
+    # Handlers doing file I/O run on the listener's thread, the event loop
+    # only pays for a queue put. Installed for the app's lifespan only, so
+    # the queue never fills up where no listener drains it.
+    file_handler = logging.FileHandler(Config.LOG_FILE)
+    file_handler.setFormatter(JSONFormatter())
 
-        return response
-    
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
 
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.addHandler(queue_handler)
+    access_logger.addHandler(queue_handler)
+    listener.start()
+    try:
+        yield listener
+    finally:
+        root.removeHandler(queue_handler)
+        access_logger.removeHandler(queue_handler)
+        listener.stop()
+        file_handler.close()
 
-    return app
 
+def redact_headers(raw_headers) -> dict:
+    headers = {}
+    for name, value in raw_headers:
+        key = name.decode("latin-1").lower()
+        headers[key] = "[REDACTED]" if key in REDACTED_HEADERS else value.decode("latin-1")
+    return headers
+
+
+class AccessLogMiddleware:
+    """Structured access log as a pure ASGI middleware."""
+
+    def __init__(self, app, sample_rate: float = 1.0):
+        self.app = app
+        self.sample_rate = sample_rate
 
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or random.random() >= self.sample_rate:
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            access_logger.info("access", extra={"access": {
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status_code,
+                "duration_ms": round((time.perf_counter() - start_time) * 1000, 3),
+                "client": scope["client"][0] if scope.get("client") else None,
+                "headers": redact_headers(scope["headers"]),
+            }})
+
+
+def register_middleware(app: FastAPI):
+    app.add_middleware(QueryProfilingMiddleware, server_timing=Config.DEBUG)
+    app.add_middleware(MetricsMiddleware)
+    app.add_middleware(AccessLogMiddleware, sample_rate=Config.ACCESS_LOG_SAMPLE_RATE)
+
+    return app
@@ -0,0 +1,29 @@
+"""review book keyset indexes
+
+Revision ID: 1b6d2f94e0a3
+Revises: e2b95f3a7c14
+Create Date: 2026-10-18 16:41:52.117904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel 
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1b6d2f94e0a3'
+down_revision: Union[str, None] = 'e2b95f3a7c14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_review_book_id_created_at_id', 'review', ['book_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_review_book_id_rating_created_at_id', 'review', ['book_id', 'rating', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_review_book_id_rating_created_at_id', table_name='review')
+    op.drop_index('ix_review_book_id_created_at_id', table_name='review')
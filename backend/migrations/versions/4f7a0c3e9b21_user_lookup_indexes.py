@@ -0,0 +1,34 @@
+"""user lookup indexes
+
+Revision ID: 4f7a0c3e9b21
+Revises: 8d2c57a1f6b9
+Create Date: 2026-10-18 20:12:09.381554
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel 
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f7a0c3e9b21'
+down_revision: Union[str, None] = '8d2c57a1f6b9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # book.created_at, book.user_id and review.book_id are already covered by
+    # the keyset indexes. The unique indexes fail if duplicates exist, which
+    # have to be merged by hand first.
+    op.create_index('ix_user_email', 'user', ['email'], unique=True)
+    op.create_index('ix_user_username', 'user', ['username'], unique=True)
+    op.create_index('ix_review_user_id', 'review', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_review_user_id', table_name='review')
+    op.drop_index('ix_user_username', table_name='user')
+    op.drop_index('ix_user_email', table_name='user')
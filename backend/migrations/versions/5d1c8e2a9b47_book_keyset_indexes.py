@@ -0,0 +1,29 @@
+"""book keyset indexes
+
+Revision ID: 5d1c8e2a9b47
+Revises: cecd6ec3795a
+Create Date: 2026-10-18 09:12:41.503214
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel 
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d1c8e2a9b47'
+down_revision: Union[str, None] = 'cecd6ec3795a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_book_created_at_id', 'book', ['created_at', 'id'], unique=False)
+    op.create_index('ix_book_user_id_created_at_id', 'book', ['user_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_book_user_id_created_at_id', table_name='book')
+    op.drop_index('ix_book_created_at_id', table_name='book')
@@ -0,0 +1,30 @@
+"""review book fk cascade
+
+Revision ID: 8d2c57a1f6b9
+Revises: 1b6d2f94e0a3
+Create Date: 2026-10-18 19:05:37.640218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel 
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2c57a1f6b9'
+down_revision: Union[str, None] = '1b6d2f94e0a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The constraint was created unnamed, this is PostgreSQL's default name
+    op.drop_constraint('review_book_id_fkey', 'review', type_='foreignkey')
+    op.create_foreign_key('review_book_id_fkey', 'review', 'book', ['book_id'], ['id'], ondelete='CASCADE')
+
+
+def downgrade() -> None:
+    op.drop_constraint('review_book_id_fkey', 'review', type_='foreignkey')
+    op.create_foreign_key('review_book_id_fkey', 'review', 'book', ['book_id'], ['id'])
@@ -0,0 +1,27 @@
+"""user token version
+
+Revision ID: a3f08c61d2e5
+Revises: 5d1c8e2a9b47
+Create Date: 2026-10-18 10:02:17.884310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel 
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f08c61d2e5'
+down_revision: Union[str, None] = '5d1c8e2a9b47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('user', sa.Column('token_version', sa.INTEGER(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('user', 'token_version')
@@ -0,0 +1,37 @@
+"""book search vector
+
+Revision ID: c7e41b9d08fa
+Revises: a3f08c61d2e5
+Create Date: 2026-10-18 13:47:05.219863
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel 
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7e41b9d08fa'
+down_revision: Union[str, None] = 'a3f08c61d2e5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 'simple' config: no stemming, titles and names are matched as written
+    op.execute("""
+        ALTER TABLE book ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(author, '')), 'B') ||
+            setweight(to_tsvector('simple', coalesce(publisher, '')), 'C') ||
+            setweight(to_tsvector('simple', coalesce(language, '')), 'D')
+        ) STORED
+    """)
+    op.create_index('ix_book_search_vector', 'book', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_book_search_vector', table_name='book', postgresql_using='gin')
+    op.drop_column('book', 'search_vector')
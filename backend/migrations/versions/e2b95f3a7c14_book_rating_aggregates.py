@@ -0,0 +1,65 @@
+"""book rating aggregates
+
+Revision ID: e2b95f3a7c14
+Revises: c7e41b9d08fa
+Create Date: 2026-10-18 15:20:33.604118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel 
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b95f3a7c14'
+down_revision: Union[str, None] = 'c7e41b9d08fa'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = ('review_count', 'rating_sum', 'rating_1', 'rating_2', 'rating_3', 'rating_4', 'rating_5')
+
+
+def upgrade() -> None:
+    for name in COLUMNS:
+        op.add_column('book', sa.Column(name, sa.INTEGER(), server_default='0', nullable=False))
+
+    # Backfill from existing reviews; later drift is repaired with
+    # `python -m books.ratings backfill`
+    op.execute("""
+        UPDATE book SET
+            review_count = agg.review_count,
+            rating_sum = agg.rating_sum,
+            rating_1 = agg.rating_1,
+            rating_2 = agg.rating_2,
+            rating_3 = agg.rating_3,
+            rating_4 = agg.rating_4,
+            rating_5 = agg.rating_5
+        FROM (
+            SELECT book_id,
+                   count(*) AS review_count,
+                   sum(rating) AS rating_sum,
+                   count(*) FILTER (WHERE rating = 1) AS rating_1,
+                   count(*) FILTER (WHERE rating = 2) AS rating_2,
+                   count(*) FILTER (WHERE rating = 3) AS rating_3,
+                   count(*) FILTER (WHERE rating = 4) AS rating_4,
+                   count(*) FILTER (WHERE rating = 5) AS rating_5
+            FROM review
+            GROUP BY book_id
+        ) AS agg
+        WHERE book.id = agg.book_id
+    """)
+
+    op.create_index(
+        'ix_book_average_rating', 'book',
+        [sa.text('(CAST(rating_sum AS FLOAT) / review_count) DESC'), sa.text('review_count DESC'), sa.text('id DESC')],
+        unique=False,
+        postgresql_where=sa.text('review_count > 0'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_book_average_rating', table_name='book')
+    for name in reversed(COLUMNS):
+        op.drop_column('book', name)
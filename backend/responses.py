@@ -0,0 +1,32 @@
+from functools import lru_cache
+from typing import Any, Optional
+from fastapi import Response, status
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
+
+
+# App-wide default; routes below bypass it entirely for ORM payloads
+DefaultResponse = ORJSONResponse
+
+
+@lru_cache(maxsize=None)
+def type_adapter(schema: Any) -> TypeAdapter:
+    # Building an adapter compiles a validator and serializer, do it once per type
+    return TypeAdapter(schema)
+
+
+def dump_json(schema: Any, value: Any) -> bytes:
+    # One validation from attributes, then pydantic-core writes the JSON;
+    # no jsonable_encoder pass and no dict round trip
+    adapter = type_adapter(schema)
+    return adapter.dump_json(adapter.validate_python(value, from_attributes=True))
+
+
+def model_response(
+    schema: Any, value: Any, status_code: int = status.HTTP_200_OK, headers: Optional[dict] = None
+) -> Response:
+    # Returning a Response makes FastAPI skip its own response_model pass;
+    # keep response_model on the route for the OpenAPI schema
+    return Response(
+        content=dump_json(schema, value), status_code=status_code, media_type="application/json", headers=headers
+    )
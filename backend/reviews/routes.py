@@ -1,28 +1,46 @@
 import uuid
-from fastapi import APIRouter, Depends
-from db.models import User
-from reviews.schemas import ReviewCreateModel
-from db.main import get_session
+from fastapi import APIRouter, Depends, Query
+from reviews.schemas import ReviewCreateModel, ReviewModel, ReviewPageModel
+from responses import model_response
+from db.main import get_session, get_read_session
 from sqlmodel.ext.asyncio.session import AsyncSession 
 from reviews.service import ReviewService
-from auth.dependecies import get_current_user
+from auth.dependecies import access_token_bearer
+from config import Config
+from typing import Optional
 
 review_router = APIRouter()
 review_service = ReviewService()
 
-@review_router.post('/book/{book_id}')
+@review_router.post('/book/{book_id}', response_model=ReviewModel)
 async def add_review_to_book(
     book_id: uuid.UUID, 
     review_data : ReviewCreateModel, 
-    current_user:User= Depends(get_current_user), 
+    token_details=Depends(access_token_bearer),
     session :AsyncSession= Depends(get_session) ):
 
 
     new_review = await review_service.add_review_to_book(
-        user_email=current_user.email,
+        user_id=token_details['user']['user_uid'],
         review_data= review_data,
         book_id= book_id,
         session= session,
     )
 
-    return new_review
+    return model_response(ReviewModel, new_review)
+
+
+
+@review_router.get('/book/{book_id}', response_model=ReviewPageModel)
+async def get_book_reviews(
+    book_id: uuid.UUID,
+    sort: str = Query(default="newest", pattern="^(newest|rating)$"),
+    limit: int = Query(default=Config.PAGE_SIZE_DEFAULT, ge=1),
+    cursor: Optional[str] = None,
+    token_details=Depends(access_token_bearer),
+    session :AsyncSession= Depends(get_read_session) ):
+
+    page = await review_service.get_book_reviews(
+        book_id=book_id, session=session, sort=sort, limit=limit, cursor=cursor
+    )
+    return model_response(ReviewPageModel, page)
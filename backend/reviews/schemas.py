@@ -1,5 +1,5 @@
 from datetime import datetime, timezone
-from typing import Optional
+from typing import List, Optional
 from db.models import remove_timezone
 import uuid
 from pydantic import BaseModel, Field
@@ -13,6 +13,11 @@ class ReviewModel(BaseModel):
     book_id : Optional[uuid.UUID]
     created_at: datetime 
     
+
+class ReviewPageModel(BaseModel):
+    items: List[ReviewModel]
+    next_cursor: Optional[str] = None
+
  
 class ReviewCreateModel(BaseModel):
     rating: int = Field(ge=1, le=5)
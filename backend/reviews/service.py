@@ -1,42 +1,105 @@
 from fastapi import HTTPException, status
 from sqlmodel.ext.asyncio.session import AsyncSession
-from db.models import Review
-from auth.service import UserService
-from books.service import BookService
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select, desc
+from db.models import Book, Review, remove_timezone
+from books.cache import book_cache
+from books.ratings import rating_increment_values
 from reviews.schemas import ReviewCreateModel
+from db.pagination import encode_cursor, decode_cursor, after_cursor
+from config import Config
+from datetime import datetime, timezone
+from typing import Optional
 import uuid
 
-book_service = BookService()
-user_service = UserService()
+
+# Sort key columns for each review ordering, all descending
+REVIEW_SORT_KEYS = {
+    "newest": ((Review.created_at, datetime), (Review.id, uuid.UUID)),
+    "rating": ((Review.rating, int), (Review.created_at, datetime), (Review.id, uuid.UUID)),
+}
 
 
 class ReviewService:
+    async def get_book_reviews(
+        self, book_id: uuid.UUID, session: AsyncSession, sort: str = "newest",
+        limit: int = Config.PAGE_SIZE_DEFAULT, cursor: Optional[str] = None
+    ):
+        try:
+            limit = max(1, min(limit, Config.PAGE_SIZE_MAX))
+            columns = [column for column, _ in REVIEW_SORT_KEYS[sort]]
+
+            statement = select(Review).where(Review.book_id == book_id)
+            if cursor:
+                values = decode_cursor(cursor, *[type_ for _, type_ in REVIEW_SORT_KEYS[sort]])
+                statement = statement.where(after_cursor(columns, values))
+
+            statement = statement.order_by(*[desc(column) for column in columns]).limit(limit + 1)
+            result = await session.exec(statement)
+            reviews = result.all()
+
+            next_cursor = None
+            if len(reviews) > limit:
+                reviews = reviews[:limit]
+                last = reviews[-1]
+                next_cursor = encode_cursor(*[getattr(last, column.key) for column in columns])
+
+            return {"items": reviews, "next_cursor": next_cursor}
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"An error occurred: {str(e)}",
+            )
+
     async def add_review_to_book(
-        self, user_email: str, book_id: uuid.UUID, review_data: ReviewCreateModel, session: AsyncSession
+        self, user_id: uuid.UUID, book_id: uuid.UUID, review_data: ReviewCreateModel, session: AsyncSession
     ):
+        # Two statements and no ORM loads: the aggregate UPDATE doubles as the
+        # book existence check and the insert relies on the user FK
         try:
-            book = await book_service.get_book(book_id=book_id, session=session)
-            if not book:
+            now = remove_timezone(datetime.now(timezone.utc))
+            book_result = await session.execute(
+                update(Book)
+                .where(Book.id == book_id)
+                # updated_at moves with the aggregates so Last-Modified does too
+                .values(**rating_increment_values(review_data.rating), updated_at=now)
+                .returning(Book.id)
+            )
+            if book_result.first() is None:
+                await session.rollback()
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND, detail="Book not found"
                 )
 
-            user = await user_service.get_user_by_email(email=user_email, session=session)
-            if not user:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+            review_result = await session.execute(
+                insert(Review)
+                .values(
+                    id=uuid.uuid4(),
+                    **review_data.model_dump(exclude={"created_at"}),
+                    user_id=uuid.UUID(str(user_id)),
+                    book_id=book_id,
+                    created_at=now,
+                    updated_at=now,
                 )
-
-            new_review = Review(**review_data.model_dump())  # For Pydantic v1, use .dict()
-            new_review.user = user
-            new_review.book = book
-
-            session.add(new_review)
+                .returning(*Review.__table__.columns)
+            )
+            new_review = Review.model_validate(review_result.mappings().one())
             await session.commit()
-            await session.refresh(new_review)  # Ensures latest DB state
+            # List pages show review_count too, so they are invalidated as well
+            await book_cache.invalidate(book_id)
 
             return new_review
 
+        except IntegrityError:
+            # The only FK left unchecked is the user's, e.g. a deleted account
+            # still holding a valid token
+            await session.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+            )
         except HTTPException:
             raise  
         except Exception as e:
@@ -0,0 +1,122 @@
+import importlib
+import os
+import re
+import tempfile
+import uuid
+from datetime import date, datetime, timezone
+
+# Config is read at import time, so the environment is settled before any
+# application module is imported. DEBUG turns on the Server-Timing header
+# the statement counts are read from. TEST_DATABASE_URL runs the suite
+# against a PostgreSQL database migrated with alembic instead of SQLite.
+os.environ.update(
+    DATABASE_URL=os.getenv("TEST_DATABASE_URL") or f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/test.db",
+    DATABASE_READ_URL="",
+    JWT_SECRET="test-secret",
+    JWT_ALGORITHM="HS256",
+    MAIL_PORT="587",
+    DOMAIN="http://test/",
+    DEBUG="true",
+    BOOK_CACHE_ENABLED="false",
+    BCRYPT_ROUNDS="4",
+)
+
+import fakeredis
+import httpx
+import pytest
+from sqlalchemy import insert
+
+
+SERVER_TIMING_QUERIES = re.compile(r'db;dur=[\d.]+;desc="(\d+) queries"')
+
+
+def statement_count(response) -> int:
+    # Filled from db.profiling.current_stats by QueryProfilingMiddleware
+    match = SERVER_TIMING_QUERIES.search(response.headers["server-timing"])
+    return int(match.group(1))
+
+
+@pytest.fixture(scope="session")
+async def app():
+    import db.redis
+    from books.cache import book_cache
+    from db.main import init_db
+
+    client = fakeredis.FakeAsyncRedis()
+    db.redis.redis_client = client
+    db.redis.token_blocklist = client
+    db.redis.blocklist_cache.client = client
+    book_cache.client = client
+
+    await init_db()
+    return importlib.import_module("__init__").app
+
+
+@pytest.fixture(scope="session")
+async def client(app):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+async def _insert_user(role: str = "user") -> dict:
+    from db.main import AsyncSessionLocal
+    from db.models import User, remove_timezone
+    from auth.utils import create_access_token, user_token_claims
+    from db.redis import set_token_version
+
+    now = remove_timezone(datetime.now(timezone.utc))
+    name = f"{role}_{uuid.uuid4().hex[:8]}"
+    row = {
+        "id": uuid.uuid4(), "username": name, "email": f"{name}@example.com", "password_hash": "",
+        "role": role, "is_verified": True, "token_version": 0, "created_at": now, "updated_at": now,
+    }
+    async with AsyncSessionLocal() as session:
+        await session.execute(insert(User), [row])
+        await session.commit()
+    # As UserService.create_user does
+    await set_token_version(str(row["id"]), 0)
+
+    user = User(**row)
+    token = create_access_token(user_token_claims(user))
+    return {"id": row["id"], "headers": {"Authorization": f"Bearer {token}"}}
+
+
+@pytest.fixture
+async def user(app) -> dict:
+    return await _insert_user()
+
+
+@pytest.fixture
+async def admin(app) -> dict:
+    return await _insert_user("admin")
+
+
+@pytest.fixture
+def make_book(app):
+    async def make_book(owner: dict, reviews: int = 0) -> uuid.UUID:
+        from db.main import AsyncSessionLocal
+        from db.models import Book, Review, remove_timezone
+
+        now = remove_timezone(datetime.now(timezone.utc))
+        book_id = uuid.uuid4()
+        book = {
+            "id": book_id, "title": "Test Book", "author": "Author", "publisher": "Publisher",
+            "published_date": date(2020, 1, 1), "page_count": 100, "language": "en",
+            "user_id": owner["id"], "created_at": now, "updated_at": now,
+            "review_count": reviews, "rating_sum": 4 * reviews, "rating_1": 0, "rating_2": 0,
+            "rating_3": 0, "rating_4": reviews, "rating_5": 0,
+        }
+        review_rows = [
+            {"id": uuid.uuid4(), "rating": 4, "review_text": f"Review {i}", "user_id": owner["id"],
+             "book_id": book_id, "created_at": now, "updated_at": now}
+            for i in range(reviews)
+        ]
+        async with AsyncSessionLocal() as session:
+            await session.execute(insert(Book), [book])
+            if review_rows:
+                await session.execute(insert(Review), review_rows)
+            await session.commit()
+        return book_id
+
+    return make_book
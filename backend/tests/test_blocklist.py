@@ -0,0 +1,109 @@
+import asyncio
+import uuid
+import fakeredis
+import pytest
+import db.redis
+from config import Config
+from db.redis import LocalBlocklist, add_jti_to_blocklist, get_token_version, token_in_blocklist
+
+
+async def wait_for(condition, timeout: float = 2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+async def blocklist():
+    blocklist = LocalBlocklist(fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer()))
+    yield blocklist
+    await blocklist.stop()
+
+
+async def test_warm_up_loads_revocations_and_versions(blocklist):
+    legacy_jti, jti, user_uid = str(uuid.uuid4()), str(uuid.uuid4()), str(uuid.uuid4())
+    await blocklist.client.set(f"blocklist:{jti}", "", ex=60)
+    await blocklist.client.set(legacy_jti, "", ex=60)
+    await blocklist.client.set(f"token_version:{user_uid}", 3)
+
+    await blocklist.start()
+    await wait_for(lambda: blocklist.ready)
+
+    assert blocklist.is_revoked(jti) and blocklist.is_revoked(legacy_jti)
+    assert blocklist.versions == {user_uid: 3}
+
+
+async def test_published_revocations_reach_other_processes(blocklist):
+    await blocklist.start()
+    await wait_for(lambda: blocklist.ready)
+    jti, user_uid = str(uuid.uuid4()), str(uuid.uuid4())
+
+    # Another process revoking a token and bumping a token version
+    await blocklist.client.publish(db.redis.BLOCKLIST_CHANNEL, f"revoke:{jti}")
+    await blocklist.client.publish(db.redis.BLOCKLIST_CHANNEL, f"version:{user_uid}:2")
+
+    await wait_for(lambda: blocklist.is_revoked(jti) and blocklist.versions.get(user_uid) == 2)
+
+
+async def test_answered_pings_keep_the_subscription(blocklist, monkeypatch):
+    monkeypatch.setattr(Config, "TOKEN_BLOCKLIST_PING_INTERVAL", 0.02)
+    await blocklist.start()
+    await wait_for(lambda: blocklist.ready)
+
+    await asyncio.sleep(0.2)
+    assert blocklist.ready and not blocklist._task.done()
+
+
+async def test_unanswered_ping_drops_the_subscription(monkeypatch):
+    monkeypatch.setattr(Config, "TOKEN_BLOCKLIST_PING_INTERVAL", 0.01)
+
+    class HalfOpenPubSub:
+        # Writes succeed, nothing ever comes back
+        pings = 0
+
+        async def get_message(self, timeout):
+            await asyncio.sleep(timeout)
+
+        async def ping(self):
+            self.pings += 1
+
+    pubsub = HalfOpenPubSub()
+    with pytest.raises(ConnectionError):
+        await LocalBlocklist(None)._consume(pubsub)
+    assert pubsub.pings == 1
+
+
+async def test_lookups_fall_back_to_redis_until_ready(app, monkeypatch):
+    monkeypatch.setattr(db.redis.blocklist_cache, "ready", False)
+    jti, legacy_jti, user_uid = str(uuid.uuid4()), str(uuid.uuid4()), str(uuid.uuid4())
+
+    await add_jti_to_blocklist(jti)
+    await db.redis.token_blocklist.set(legacy_jti, "", ex=60)
+    await db.redis.token_blocklist.set(f"token_version:{user_uid}", 4)
+    db.redis.blocklist_cache.revoked.clear()
+
+    assert await token_in_blocklist(jti)
+    assert await token_in_blocklist(legacy_jti)
+    assert not await token_in_blocklist(str(uuid.uuid4()))
+    assert await get_token_version(user_uid) == 4
+
+
+async def test_evicted_token_version_is_read_from_the_database(client, user):
+    from sqlalchemy import update
+    from db.main import AsyncSessionLocal
+    from db.models import User
+
+    user_uid = str(user["id"])
+    # A bump whose Redis key has since been evicted
+    async with AsyncSessionLocal() as session:
+        await session.execute(update(User).where(User.id == user["id"]).values(token_version=1))
+        await session.commit()
+    await db.redis.token_blocklist.delete(f"token_version:{user_uid}")
+    db.redis.blocklist_cache.versions.pop(user_uid, None)
+
+    response = await client.get("/api/v1/auth/me", headers=user["headers"])
+
+    assert response.status_code == 403
+    assert response.json()["detail"]["error"] == "THIS TOKEN IS OUTDATED"
+    assert await db.redis.token_blocklist.get(f"token_version:{user_uid}") == b"1"
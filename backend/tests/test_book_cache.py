@@ -0,0 +1,50 @@
+import asyncio
+import pytest
+from books.cache import book_cache
+from books.routes import book_service
+
+
+@pytest.fixture
+def cache_enabled(monkeypatch):
+    monkeypatch.setattr(book_cache, "enabled", True)
+
+
+async def test_write_retires_cached_detail(client, user, make_book, cache_enabled):
+    book_id = await make_book(user)
+    first = await client.get(f"/api/v1/books/{book_id}", headers=user["headers"])
+
+    response = await client.patch(f"/api/v1/books/{book_id}", json={"title": "B"}, headers=user["headers"])
+    assert response.status_code == 200
+
+    second = await client.get(f"/api/v1/books/{book_id}", headers=user["headers"])
+    assert second.json()["title"] == "B"
+    revalidated = await client.get(
+        f"/api/v1/books/{book_id}", headers={**user["headers"], "If-None-Match": first.headers["etag"]}
+    )
+    assert revalidated.status_code == 200
+
+
+async def test_load_racing_a_write_is_not_cached(client, user, make_book, cache_enabled, monkeypatch):
+    book_id = await make_book(user)
+    loaded, resume = asyncio.Event(), asyncio.Event()
+    get_book_detail = book_service.get_book_detail
+
+    async def slow_get_book_detail(*args, **kwargs):
+        # Reads the row, then stalls until the write has committed
+        book = await get_book_detail(*args, **kwargs)
+        loaded.set()
+        await resume.wait()
+        return book
+
+    monkeypatch.setattr(book_service, "get_book_detail", slow_get_book_detail)
+    stale_read = asyncio.create_task(client.get(f"/api/v1/books/{book_id}", headers=user["headers"]))
+    await loaded.wait()
+    monkeypatch.setattr(book_service, "get_book_detail", get_book_detail)
+
+    response = await client.patch(f"/api/v1/books/{book_id}", json={"title": "B"}, headers=user["headers"])
+    assert response.status_code == 200
+    resume.set()
+    assert (await stale_read).json()["title"] == "Test Book"
+
+    response = await client.get(f"/api/v1/books/{book_id}", headers=user["headers"])
+    assert response.json()["title"] == "B"
@@ -0,0 +1,40 @@
+import json
+from sqlalchemy import func, select
+from books import importer
+from books.importer import import_books, iter_records
+from config import Config
+from db.profiling import capture_statements
+
+
+async def _lines(records: list[dict]):
+    for record in records:
+        yield json.dumps(record).encode()
+
+
+def _book(i: int) -> dict:
+    return {
+        "title": f"Imported {i}", "author": "Author", "publisher": "Publisher",
+        "published_date": "2020-01-01", "page_count": 100, "language": "en",
+    }
+
+
+async def test_import_sends_one_multi_row_insert_per_chunk(user, monkeypatch):
+    from db.main import AsyncSessionLocal
+    from db.models import Book
+
+    monkeypatch.setattr(Config, "BOOK_IMPORT_BATCH_SIZE", 4)
+    # Ten columns per row: three rows fit in one statement
+    monkeypatch.setattr(importer, "MAX_INSERT_PARAMS", 30)
+
+    records = iter_records(_lines([_book(i) for i in range(5)]), "ndjson")
+    async with AsyncSessionLocal() as session:
+        with capture_statements() as statements:
+            result = await import_books(records, user["id"], session)
+
+        owned = await session.scalar(select(func.count()).select_from(Book).where(Book.user_id == user["id"]))
+
+    assert result == {"inserted": 5, "failed": 0, "errors": [], "aborted": False}
+    assert owned == 5
+    rows_per_insert = [len(parameters) // 10 for statement, parameters in statements if statement.startswith("INSERT INTO book")]
+    # Batches of 4 and 1; the first is split into 3 + 1 rows
+    assert rows_per_insert == [3, 1, 1]
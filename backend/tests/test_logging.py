@@ -0,0 +1,25 @@
+import json
+import logging
+from logging.handlers import QueueHandler
+from config import Config
+from middleware import access_logger, file_logging
+
+
+def queue_handlers() -> list:
+    return [h for h in logging.getLogger().handlers + access_logger.handlers if isinstance(h, QueueHandler)]
+
+
+def test_importing_the_app_installs_no_log_queue(app):
+    assert queue_handlers() == []
+
+
+def test_file_logging_lasts_for_the_block(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "LOG_FILE", str(tmp_path / "app.log"))
+
+    with file_logging():
+        assert len(queue_handlers()) == 2
+        access_logger.info("access", extra={"access": {"path": "/test"}})
+
+    assert queue_handlers() == []
+    entry = json.loads((tmp_path / "app.log").read_text())
+    assert entry["path"] == "/test"
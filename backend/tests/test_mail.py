@@ -0,0 +1,42 @@
+import json
+import smtplib
+import uuid
+import fakeredis
+from kombu.exceptions import OperationalError
+import celery_tasks
+from config import Config
+
+
+async def test_signup_survives_broker_outage(client, monkeypatch):
+    published = []
+
+    def delay(*args, **kwargs):
+        published.append(args)
+        raise OperationalError("Error 111 connecting to redis_db:6379. Connection refused.")
+
+    monkeypatch.setattr(celery_tasks.send_email, "delay", delay)
+    name = f"signup_{uuid.uuid4().hex[:8]}"
+    response = await client.post(
+        "/api/v1/auth/signup", json={"username": name, "email": f"{name}@example.com", "password": "Passw0rd!x"}
+    )
+
+    assert response.status_code == 201, response.text
+    assert published == [([f"{name}@example.com"],)]
+
+
+def test_dead_letter_leaves_out_body_and_is_capped(monkeypatch):
+    dead_letters = fakeredis.FakeRedis()
+    monkeypatch.setattr(celery_tasks, "dead_letters", dead_letters)
+    monkeypatch.setattr(Config, "MAIL_DEAD_LETTER_MAX", 2)
+
+    for i in range(3):
+        celery_tasks.send_email.on_failure(
+            smtplib.SMTPServerDisconnected("gone"), f"task-{i}", (["a@example.com"],),
+            {"subject": "Reset", "body": '<a href="http://test/reset/secret">link</a>'}, None,
+        )
+
+    entries = [json.loads(entry) for entry in dead_letters.lrange(Config.MAIL_DEAD_LETTER_KEY, 0, -1)]
+    assert [entry["task_id"] for entry in entries] == ["task-1", "task-2"]
+    assert entries[0]["recipients"] == ["a@example.com"] and entries[0]["subject"] == "Reset"
+    assert "body" not in entries[0]
+    assert 0 < dead_letters.ttl(Config.MAIL_DEAD_LETTER_KEY) <= Config.MAIL_DEAD_LETTER_TTL
@@ -0,0 +1,38 @@
+import pytest
+from conftest import statement_count
+
+
+# Statements per request; none of them may depend on how many rows the
+# book or user has. Raising a bound needs a reason in the commit.
+ENDPOINTS = {
+    "list_books": (3, lambda ctx: ("GET", "/api/v1/books/", {})),
+    "user_books": (3, lambda ctx: ("GET", f"/api/v1/books/user/{ctx['user']['id']}", {})),
+    "top_rated": (2, lambda ctx: ("GET", "/api/v1/books/top-rated", {})),
+    "book_detail": (4, lambda ctx: ("GET", f"/api/v1/books/{ctx['book']}", {})),
+    "book_detail_latest_reviews": (4, lambda ctx: ("GET", f"/api/v1/books/{ctx['book']}", {"params": {"reviews_limit": 5}})),
+    "books_batch": (3, lambda ctx: ("POST", "/api/v1/books/batch", {"json": {"ids": [str(ctx["book"]), str(ctx["other"])]}})),
+    "book_reviews": (1, lambda ctx: ("GET", f"/api/v1/reviews/book/{ctx['book']}", {})),
+    "me": (5, lambda ctx: ("GET", "/api/v1/auth/me", {})),
+    "create_book": (3, lambda ctx: ("POST", "/api/v1/books/", {"json": {
+        "title": "New", "author": "Author", "publisher": "Publisher", "published_date": "2020-01-01",
+        "page_count": 10, "language": "en"}})),
+    "update_book": (2, lambda ctx: ("PATCH", f"/api/v1/books/{ctx['book']}", {"json": {"title": "Renamed"}})),
+    "delete_book": (2, lambda ctx: ("DELETE", f"/api/v1/books/{ctx['other']}", {})),
+}
+
+
+async def count_statements(client, make_book, user, endpoint: str, reviews: int) -> int:
+    ctx = {"user": user, "book": await make_book(user, reviews), "other": await make_book(user, reviews)}
+    method, url, kwargs = ENDPOINTS[endpoint][1](ctx)
+    response = await client.request(method, url, headers=user["headers"], **kwargs)
+    assert response.status_code < 300, response.text
+    return statement_count(response)
+
+
+@pytest.mark.parametrize("endpoint", ENDPOINTS)
+async def test_statements_are_bounded(client, make_book, user, endpoint):
+    few = await count_statements(client, make_book, user, endpoint, reviews=1)
+    many = await count_statements(client, make_book, user, endpoint, reviews=25)
+
+    assert few <= ENDPOINTS[endpoint][0]
+    assert many == few
@@ -0,0 +1,111 @@
+import json
+import uuid
+import pytest
+from sqlalchemy import text
+import celery_tasks
+from auth.utils import create_url_safe_token
+from db.main import async_engine
+from db.profiling import capture_statements
+
+
+pytestmark = pytest.mark.skipif(
+    async_engine.dialect.name != "postgresql" or async_engine.dialect.driver != "asyncpg",
+    reason="set TEST_DATABASE_URL to a migrated postgresql+asyncpg database",
+)
+
+PASSWORD = "Passw0rd!x"
+
+
+def seq_scans(plan: dict) -> list[str]:
+    found = []
+    if plan.get("Node Type") == "Seq Scan":
+        found.append(plan.get("Relation Name"))
+    for child in plan.get("Plans", []):
+        found.extend(seq_scans(child))
+    return found
+
+
+def sql_literal(value) -> str:
+    # Untyped literals take the type of the prepared statement's parameter
+    if value is None:
+        return "NULL"
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+async def explain_generic(driver, name: str, statement: str, parameters) -> dict:
+    # Plans the statement the way the app runs it, with bind parameters and
+    # a generic plan. Literal values would let the planner match partial
+    # indexes that a bound parameter never can.
+    # No arguments: asyncpg sends it over the simple protocol, so the $n
+    # placeholders belong to the PREPARE rather than to this call
+    await driver.execute(f"PREPARE {name} AS {statement}")
+    try:
+        params = ", ".join(sql_literal(value) for value in parameters or ())
+        execute = f"EXECUTE {name}({params})" if params else f"EXECUTE {name}"
+        plan = await driver.fetchval(f"EXPLAIN (FORMAT JSON) {execute}")
+    finally:
+        await driver.execute(f"DEALLOCATE {name}")
+    return json.loads(plan) if isinstance(plan, str) else plan
+
+
+async def drive_hot_endpoints(client, make_book, monkeypatch) -> None:
+    monkeypatch.setattr(celery_tasks.send_email, "delay", lambda *args, **kwargs: None)
+    name = f"plans_{uuid.uuid4().hex[:8]}"
+    response = await client.post(
+        "/api/v1/auth/signup", json={"username": name, "email": f"{name}@example.com", "password": PASSWORD}
+    )
+    assert response.status_code == 201, response.text
+    response = await client.get(f"/api/v1/auth/verify/{create_url_safe_token({'email': f'{name}@example.com'})}")
+    assert response.status_code == 200, response.text
+    response = await client.post("/api/v1/auth/login", json={"username": name, "password": PASSWORD})
+    assert response.status_code == 200, response.text
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    user_id = (await client.get("/api/v1/auth/me", headers=headers)).json()["id"]
+
+    owner = {"id": uuid.UUID(user_id)}
+    book_id = await make_book(owner, reviews=3)
+    await make_book(owner)
+    first_page = (await client.get("/api/v1/books/", params={"limit": 1}, headers=headers)).json()
+    requests = [
+        ("GET", "/api/v1/auth/me", {}),
+        ("GET", "/api/v1/books/", {"params": {"limit": 1, "cursor": first_page["next_cursor"]}}),
+        ("GET", f"/api/v1/books/user/{user_id}", {}),
+        ("GET", f"/api/v1/books/{book_id}", {}),
+        ("GET", f"/api/v1/books/{book_id}", {"params": {"reviews_limit": 2}}),
+        ("GET", "/api/v1/books/top-rated", {}),
+        ("GET", "/api/v1/books/search", {"params": {"q": "book"}}),
+        ("POST", "/api/v1/books/batch", {"json": {"ids": [str(book_id)]}}),
+        ("GET", f"/api/v1/reviews/book/{book_id}", {"params": {"sort": "newest"}}),
+        ("GET", f"/api/v1/reviews/book/{book_id}", {"params": {"sort": "rating"}}),
+        ("PATCH", f"/api/v1/books/{book_id}", {"json": {"title": "Renamed"}}),
+    ]
+    for method, url, kwargs in requests:
+        response = await client.request(method, url, headers=headers, **kwargs)
+        assert response.status_code < 300, f"{method} {url}: {response.text}"
+
+
+async def test_service_queries_use_indexes(client, make_book, monkeypatch):
+    with capture_statements() as statements:
+        await drive_hot_endpoints(client, make_book, monkeypatch)
+
+    # INSERTs have nothing to scan; SELECT, UPDATE and DELETE plans are checked
+    checked = {}
+    for statement, parameters in statements:
+        if statement.lstrip().split(None, 1)[0].upper() in ("SELECT", "UPDATE", "DELETE", "WITH"):
+            checked.setdefault(statement, parameters)
+    assert checked
+
+    failures = {}
+    async with async_engine.connect() as conn:
+        # With seq scans priced out, the planner only picks one when no index fits
+        await conn.execute(text("SET LOCAL enable_seqscan = off"))
+        await conn.execute(text("SET LOCAL plan_cache_mode = force_generic_plan"))
+        driver = (await conn.get_raw_connection()).driver_connection
+        for index, (statement, parameters) in enumerate(checked.items()):
+            plan = await explain_generic(driver, f"plan_check_{index}", statement, parameters)
+            tables = seq_scans(plan[0]["Plan"])
+            if tables:
+                failures[statement] = tables
+        await conn.rollback()
+
+    assert not failures, json.dumps(failures, indent=2)
@@ -0,0 +1,44 @@
+import uuid
+from sqlmodel import select
+from conftest import statement_count
+
+
+async def test_add_review_is_two_statements(client, user, make_book):
+    book_id = await make_book(user, reviews=3)
+
+    response = await client.post(
+        f"/api/v1/reviews/book/{book_id}", json={"rating": 5, "review_text": "Great"}, headers=user["headers"]
+    )
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["book_id"] == str(book_id)
+    assert body["user_id"] == str(user["id"])
+    # Aggregate UPDATE ... RETURNING, then INSERT ... RETURNING
+    assert statement_count(response) == 2
+
+
+async def test_add_review_updates_aggregates(client, user, make_book):
+    from db.main import AsyncSessionLocal
+    from db.models import Book
+
+    book_id = await make_book(user, reviews=1)
+
+    response = await client.post(
+        f"/api/v1/reviews/book/{book_id}", json={"rating": 2, "review_text": "Meh"}, headers=user["headers"]
+    )
+    assert response.status_code == 200, response.text
+
+    async with AsyncSessionLocal() as session:
+        book = (await session.exec(select(Book).where(Book.id == book_id))).one()
+    assert (book.review_count, book.rating_sum, book.rating_2, book.rating_4) == (2, 6, 1, 1)
+
+
+async def test_add_review_to_missing_book(client, user):
+    response = await client.post(
+        f"/api/v1/reviews/book/{uuid.uuid4()}", json={"rating": 5, "review_text": "Great"}, headers=user["headers"]
+    )
+
+    assert response.status_code == 404
+    # The UPDATE matches nothing and the INSERT is never sent
+    assert statement_count(response) == 1